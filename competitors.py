@@ -60,6 +60,9 @@ COMPLAINT_PHRASES = [
     "botched",
 ]
 
+# (lowercase, display name) pairs so matching doesn't re-lowercase per post
+_COMPETITORS_LOWER = tuple((c.lower(), c) for c in COMPETITORS)
+
 session = requests.Session()
 session.headers.update({"User-Agent": USER_AGENT})
 
@@ -68,8 +71,7 @@ def _check_competitor_complaint(text):
     """Check if text contains a competitor complaint. Returns (competitor, is_complaint, score)."""
     text_lower = text.lower()
 
-    for competitor in COMPETITORS:
-        comp_lower = competitor.lower()
+    for comp_lower, competitor in _COMPETITORS_LOWER:
         if comp_lower not in text_lower:
             continue
 
@@ -85,20 +87,17 @@ def _check_competitor_complaint(text):
     return None, False, 0
 
 
-def _tag_lead_as_competitor(url, competitor, is_complaint):
+def _tag_lead_as_competitor(lead_id, competitor, is_complaint):
     """Add competitor_complaint tag to the lead's notes."""
     conn = get_connection()
-    try:
-        row = conn.execute("SELECT id, notes FROM leads WHERE url = ?", (url,)).fetchone()
+    with conn:
+        row = conn.execute("SELECT id, notes FROM leads WHERE id = ?", (lead_id,)).fetchone()
         if row:
             existing_notes = row["notes"] or ""
             tag = f"competitor_complaint:{competitor}" if is_complaint else f"competitor_mention:{competitor}"
             if tag not in existing_notes:
                 new_notes = f"{existing_notes} [{tag}]".strip()
                 conn.execute("UPDATE leads SET notes = ? WHERE id = ?", (new_notes, row["id"]))
-                conn.commit()
-    finally:
-        conn.close()
 
 
 def search_subreddit_competitors(subreddit):
@@ -142,9 +141,9 @@ def search_subreddit_competitors(subreddit):
                 post_url = f"https://reddit.com{permalink}"
                 ts = datetime.fromtimestamp(created, tz=timezone.utc).isoformat()
 
-                inserted = insert_lead("reddit", author, text[:2000], post_url, subreddit, score, ts)
-                if inserted:
-                    _tag_lead_as_competitor(post_url, comp, is_complaint)
+                lead_id = insert_lead("reddit", author, text[:2000], post_url, subreddit, score, ts)
+                if lead_id:
+                    _tag_lead_as_competitor(lead_id, comp, is_complaint)
                     label = "🎯 COMPLAINT" if is_complaint else "mention"
                     log.info(f"Competitor {label}: {comp} by u/{author} in r/{subreddit} (score={score})")
                     leads_found += 1
@@ -185,7 +184,6 @@ def get_competitor_leads(limit=500):
         "ORDER BY intent_score DESC, found_at DESC LIMIT ?",
         (limit,),
     ).fetchall()
-    conn.close()
     return [dict(r) for r in rows]
 
 
@@ -198,7 +196,6 @@ def get_competitor_stats():
     mentions = conn.execute(
         "SELECT COUNT(*) as c FROM leads WHERE notes LIKE '%competitor_mention:%'"
     ).fetchone()["c"]
-    conn.close()
     return {"complaints": complaints, "mentions": mentions}
 
 
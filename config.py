@@ -12,26 +12,24 @@ To add a new industry:
 """
 
 import os
-import importlib
+
+import profiles
+from keyword_match import KeywordMatcher
 
 # --- Load active profile ---
-_profile_name = os.environ.get("INDUSTRY_PROFILE", "remodeling_colorado")
-try:
-    _profile = importlib.import_module(f"profiles.{_profile_name}")
-    print(f"📋 Loaded profile: {getattr(_profile, 'PROFILE_NAME', _profile_name)}")
-except ImportError:
-    print(f"⚠️ Profile '{_profile_name}' not found in profiles/, falling back to remodeling_colorado")
-    _profile = importlib.import_module("profiles.remodeling_colorado")
+_profile = profiles.active()
 
 # --- Industry-specific settings (from profile) ---
+# Term tables are lowercased once here; scanners match them against lowercased text.
 SUBREDDITS = getattr(_profile, "SUBREDDITS", [])
 LOCAL_SUBREDDITS = getattr(_profile, "LOCAL_SUBREDDITS", [])
-LOCAL_REQUIRED_TERMS = getattr(_profile, "LOCAL_REQUIRED_TERMS", [])
-TARGET_LOCATIONS = getattr(_profile, "TARGET_LOCATIONS", [])
+LOCAL_SUBREDDITS_SET = frozenset(LOCAL_SUBREDDITS)  # per-post membership checks
+LOCAL_REQUIRED_TERMS = [t.lower() for t in getattr(_profile, "LOCAL_REQUIRED_TERMS", [])]
+TARGET_LOCATIONS = [t.lower() for t in getattr(_profile, "TARGET_LOCATIONS", [])]
 LOCATION_SCORE_BOOST = getattr(_profile, "LOCATION_SCORE_BOOST", 0)
-KEYWORDS = getattr(_profile, "KEYWORDS", {})
-NEGATIVE_KEYWORDS = getattr(_profile, "NEGATIVE_KEYWORDS", [])
-SELLER_SIGNALS = getattr(_profile, "SELLER_SIGNALS", [])
+KEYWORDS = {kw.lower(): weight for kw, weight in getattr(_profile, "KEYWORDS", {}).items()}
+NEGATIVE_KEYWORDS = [t.lower() for t in getattr(_profile, "NEGATIVE_KEYWORDS", [])]
+SELLER_SIGNALS = [t.lower() for t in getattr(_profile, "SELLER_SIGNALS", [])]
 
 # Optional profile fields used by other scanners
 PROFILE_COMPETITORS = getattr(_profile, "COMPETITORS", [])
@@ -41,7 +39,24 @@ PROFILE_WEB_QUERIES = getattr(_profile, "WEB_SEARCH_QUERIES", [])
 PROFILE_CRAIGSLIST_REGIONS = getattr(_profile, "CRAIGSLIST_REGIONS", [])
 PROFILE_FB_GROUPS = getattr(_profile, "FB_GROUPS", [])
 PROFILE_REPLY_TEMPLATES = getattr(_profile, "REPLY_TEMPLATES", {})
-PROFILE_NAME = getattr(_profile, "PROFILE_NAME", _profile_name)
+PROFILE_NAME = getattr(_profile, "PROFILE_NAME", _profile.__name__.rpartition(".")[2])
+
+# --- Term matchers, built once from the profile tables ---
+# KEYWORD_MATCHER yields (keyword, weight); the location and local-term
+# matchers yield the matched term.
+KEYWORD_MATCHER = KeywordMatcher((kw, (kw, weight)) for kw, weight in KEYWORDS.items())
+LOCATION_MATCHER = KeywordMatcher((loc, loc) for loc in TARGET_LOCATIONS)
+LOCAL_TERMS_MATCHER = KeywordMatcher((term, term) for term in LOCAL_REQUIRED_TERMS)
+# The tables every Reddit post is checked against, in one matcher so each post
+# is read once. Yields (table, value): (keyword, weight) for "keyword", the
+# matched term for "negative", "seller" and "location".
+# Local terms stay separate: only local-subreddit posts need them.
+PROFILE_TERM_MATCHER = KeywordMatcher(
+    [(kw, ("keyword", (kw, weight))) for kw, weight in KEYWORDS.items()]
+    + [(term, ("negative", term)) for term in NEGATIVE_KEYWORDS]
+    + [(term, ("seller", term)) for term in SELLER_SIGNALS]
+    + [(loc, ("location", loc)) for loc in TARGET_LOCATIONS]
+)
 
 # --- Global settings (same for all profiles) ---
 MIN_SCORE_THRESHOLD = 4
@@ -1,19 +1,141 @@
 """SQLite database layer for leads storage and deduplication."""
 
+import atexit
+import functools
 import sqlite3
+import threading
+import time
 from datetime import datetime, timezone, timedelta
 from config import DB_PATH
 
+# journal_mode=WAL is persistent on the database file, so it only needs
+# to be switched on once per process; the other PRAGMAs are per-connection.
+_WAL_SET = False
+
+# Each thread keeps a read connection (sqlite3.Row rows) and a write
+# connection (plain tuples), reused across calls so the page cache and the
+# statement cache stay warm. Connections are tracked by owning thread so ones
+# left behind by finished threads (e.g. per-request dashboard threads) can
+# be closed.
+_local = threading.local()
+_conns = {}
+_conns_lock = threading.Lock()
+
+# Schema setup runs once per process, on first use rather than at import
+_INIT_DONE = False
+_INIT_LOCK = threading.Lock()
+
+
+def _connect(row_factory):
+    global _WAL_SET
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
+    if row_factory:
+        conn.row_factory = sqlite3.Row
+    if not _WAL_SET:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _WAL_SET = True
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")
+    # Reads go straight to the mapped file instead of copying pages through read()
+    conn.execute("PRAGMA mmap_size=268435456")
+    return conn
+
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+def _pooled(kind, row_factory):
+    conn = getattr(_local, kind, None)
+    if conn is None:
+        conn = _connect(row_factory)
+        setattr(_local, kind, conn)
+        with _conns_lock:
+            for key in [k for k in _conns if not k[0].is_alive()]:
+                _conns.pop(key).close()
+            _conns[(threading.current_thread(), kind)] = conn
     return conn
 
 
+def _ensure_init():
+    global _INIT_DONE
+    if not _INIT_DONE:
+        with _INIT_LOCK:
+            if not _INIT_DONE:
+                init_db()
+                _INIT_DONE = True
+
+
+def get_read_connection():
+    """Return the calling thread's shared read connection. Callers must not close it."""
+    _ensure_init()
+    return _pooled("read_conn", True)
+
+
+def get_write_connection():
+    """Return the calling thread's shared write connection (tuple rows). Callers must not close it."""
+    _ensure_init()
+    return _pooled("write_conn", False)
+
+
+# Existing callers read columns by name
+get_connection = get_read_connection
+
+
+def close_all():
+    """Close every pooled connection. Call on shutdown."""
+    with _conns_lock:
+        conns = list(_conns.values())
+        _conns.clear()
+    for conn in conns:
+        try:
+            # Refresh planner stats for whatever this connection queried
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        conn.close()
+    _local.read_conn = None
+    _local.write_conn = None
+
+
+# Bumped by writers so cached reads never outlive a write made in this
+# process; writes from other processes (the scanner) age out with the TTL.
+_write_version = 0
+
+
+def _bump_write_version():
+    global _write_version
+    _write_version += 1
+
+
+def ttl_cache(seconds=10):
+    """Cache a read helper's result per args for `seconds`, or until the next write."""
+    def decorator(func):
+        cache = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            with lock:
+                hit = cache.get(args)
+            if hit and hit[0] > now and hit[1] == _write_version:
+                return hit[2]
+            version = _write_version
+            value = func(*args)
+            with lock:
+                cache[args] = (now + seconds, version, value)
+            return value
+        return wrapper
+    return decorator
+
+
+def _index_names(conn):
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
 def init_db():
     """Create tables if they don't exist."""
-    conn = get_connection()
+    conn = _pooled("write_conn", False)
+    indexes_before = _index_names(conn)
     conn.execute("""
         CREATE TABLE IF NOT EXISTS leads (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -29,8 +151,18 @@ def init_db():
         )
     """)
     conn.execute("CREATE INDEX IF NOT EXISTS idx_username ON leads(username)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_score ON leads(intent_score)")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_subreddit ON leads(subreddit)")
+    # get_leads ordering (optionally filtered by subreddit) walks these in order;
+    # they supersede the old single-column intent_score / subreddit indexes
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_score_found ON leads(intent_score DESC, found_at DESC)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_sub_score ON leads(subreddit, intent_score DESC, found_at DESC)")
+    conn.execute("DROP INDEX IF EXISTS idx_score")
+    conn.execute("DROP INDEX IF EXISTS idx_subreddit")
+    # Analytics aggregates: date-range counts, per-platform and per-hour GROUP BYs.
+    # (found_at, intent_score, subreddit) also covers the weekly report's tier
+    # counts and per-subreddit breakdown.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_found_score_sub ON leads(found_at, intent_score, subreddit)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_platform ON leads(platform)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_leads_hour ON leads(CAST(strftime('%H', found_at) AS INTEGER))")
 
     # Form leads table for landing page submissions
     conn.execute("""
@@ -62,7 +194,9 @@ def init_db():
             FOREIGN KEY (lead_id) REFERENCES leads(id)
         )
     """)
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_rq_status ON reply_queue(status)")
+    # Status filter + newest-first listing; supersedes the old status-only index
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_rq_status_created ON reply_queue(status, created_at DESC)")
+    conn.execute("DROP INDEX IF EXISTS idx_rq_status")
     conn.execute("CREATE INDEX IF NOT EXISTS idx_rq_lead ON reply_queue(lead_id)")
 
     # Add notes column to existing leads table if missing
@@ -71,81 +205,159 @@ def init_db():
     except sqlite3.OperationalError:
         pass  # column already exists
 
+    # Gather planner statistics so the indexes above get picked; redo it
+    # whenever the set of indexes changes
+    has_stats = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+    ).fetchone()
+    indexes_after = _index_names(conn)
+    if not has_stats or indexes_after != indexes_before:
+        conn.execute("ANALYZE")
+
     conn.commit()
-    conn.close()
+
+
+_INSERT_LEAD_SQL = (
+    "INSERT OR IGNORE INTO leads (platform, username, content, url, subreddit, intent_score, found_at) "
+    "VALUES (?, ?, substr(?, 1, 2000), ?, ?, ?, ?)"
+)
 
 
 def insert_lead(platform, username, content, url, subreddit, intent_score, found_at=None):
-    """Insert a lead, skipping if URL already exists. Returns True if inserted."""
+    """Insert a lead, skipping if URL already exists. Returns the new lead id, or None if skipped."""
     if found_at is None:
         found_at = datetime.now(timezone.utc).isoformat()
+    conn = get_write_connection()
+    with conn:
+        row = conn.execute(
+            _INSERT_LEAD_SQL + " RETURNING id",
+            (platform, username, content, url, subreddit, intent_score, found_at),
+        ).fetchone()
+    _bump_write_version()
+    return row[0] if row else None
+
+
+def insert_leads_bulk(rows):
+    """Insert many leads in one transaction, skipping existing URLs.
+
+    rows are (platform, username, content, url, subreddit, intent_score, found_at)
+    tuples; content is truncated to 2000 chars in SQL. Returns the number inserted.
+    """
+    if not rows:
+        return 0
+    conn = get_write_connection()
+    with conn:
+        cur = conn.executemany(_INSERT_LEAD_SQL, rows)
+    _bump_write_version()
+    return cur.rowcount
+
+
+def insert_leads_returning(rows):
+    """Insert many leads in one transaction, skipping existing URLs.
+
+    Takes the same row tuples as insert_leads_bulk. Returns a list parallel to
+    rows holding each new lead id, or None where the URL already existed.
+    """
+    if not rows:
+        return []
+    conn = get_write_connection()
+    sql = _INSERT_LEAD_SQL + " RETURNING id"
+    with conn:
+        # executemany can't hand back RETURNING rows; one commit still covers them all
+        ids = [(conn.execute(sql, row).fetchone() or (None,))[0] for row in rows]
+    _bump_write_version()
+    return ids
+
+
+def get_known_urls(urls):
+    """Return the subset of urls that already have a lead row."""
+    urls = list(urls)
     conn = get_connection()
-    try:
-        conn.execute(
-            "INSERT OR IGNORE INTO leads (platform, username, content, url, subreddit, intent_score, found_at) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (platform, username, content[:2000], url, subreddit, intent_score, found_at),
-        )
-        conn.commit()
-        return conn.total_changes > 0
-    finally:
-        conn.close()
+    known = set()
+    for i in range(0, len(urls), 500):
+        chunk = urls[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(f"SELECT url FROM leads WHERE url IN ({placeholders})", chunk).fetchall()
+        known.update(r[0] for r in rows)
+    return known
+
+
+def get_platform_urls(platform):
+    """Return the set of every stored lead URL for a platform."""
+    conn = get_connection()
+    return {r[0] for r in conn.execute("SELECT url FROM leads WHERE platform = ?", (platform,))}
 
 
 def insert_form_lead(name, email, phone, interest, budget, referral_source):
     """Insert a form submission lead."""
-    conn = get_connection()
-    try:
+    conn = get_write_connection()
+    with conn:
         conn.execute(
             "INSERT INTO form_leads (name, email, phone, interest, budget, referral_source, submitted_at) "
             "VALUES (?, ?, ?, ?, ?, ?, ?)",
             (name, email, phone, interest, budget, referral_source, datetime.now(timezone.utc).isoformat()),
         )
-        conn.commit()
-        return True
-    finally:
-        conn.close()
+    _bump_write_version()
+    return True
 
 
 def get_form_leads(limit=500):
-    """Fetch form leads."""
+    """Fetch form leads as sqlite3.Row objects."""
     conn = get_connection()
     rows = conn.execute("SELECT * FROM form_leads ORDER BY submitted_at DESC LIMIT ?", (limit,)).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    return rows
 
 
 def update_notes(lead_id, notes):
     """Update notes for a lead."""
-    conn = get_connection()
-    conn.execute("UPDATE leads SET notes = ? WHERE id = ?", (notes, lead_id))
-    conn.commit()
-    conn.close()
+    conn = get_write_connection()
+    with conn:
+        conn.execute("UPDATE leads SET notes = ? WHERE id = ?", (notes, lead_id))
 
 
 def update_form_lead_notes(lead_id, notes):
     """Update notes for a form lead."""
-    conn = get_connection()
-    conn.execute("UPDATE form_leads SET notes = ? WHERE id = ?", (notes, lead_id))
-    conn.commit()
-    conn.close()
+    conn = get_write_connection()
+    with conn:
+        conn.execute("UPDATE form_leads SET notes = ? WHERE id = ?", (notes, lead_id))
 
 
 def mark_form_lead_contacted(lead_id):
     """Toggle contacted status for a form lead."""
-    conn = get_connection()
-    conn.execute(
-        "UPDATE form_leads SET contacted = CASE WHEN contacted = 0 THEN 1 ELSE 0 END WHERE id = ?",
-        (lead_id,),
-    )
-    conn.commit()
-    conn.close()
+    conn = get_write_connection()
+    with conn:
+        conn.execute(
+            "UPDATE form_leads SET contacted = CASE WHEN contacted = 0 THEN 1 ELSE 0 END WHERE id = ?",
+            (lead_id,),
+        )
+
+
+# List views only show a 200-char preview of content
+# Column order of get_leads rows (and of the CSV export built from them)
+LEAD_COLUMNS = (
+    "id", "platform", "username", "content", "url", "subreddit",
+    "intent_score", "found_at", "contacted", "notes",
+)
+
+_LEADS_SUMMARY_COLS = (
+    "id, platform, username, substr(content, 1, 200) as content, url, subreddit, "
+    "intent_score, found_at, contacted, notes"
+)
 
 
 def get_leads(min_score=None, subreddit=None, date_from=None, contacted=None, platform=None, limit=500):
-    """Fetch leads with optional filters."""
+    """Fetch leads with optional filters, as sqlite3.Row objects with LEAD_COLUMNS in order."""
+    return _query_leads(", ".join(LEAD_COLUMNS), min_score, subreddit, date_from, contacted, platform, limit)
+
+
+def get_leads_summary(min_score=None, subreddit=None, date_from=None, contacted=None, platform=None, limit=500):
+    """Like get_leads, but content is cut to a 200-char preview for list views."""
+    return _query_leads(_LEADS_SUMMARY_COLS, min_score, subreddit, date_from, contacted, platform, limit)
+
+
+def _query_leads(columns, min_score, subreddit, date_from, contacted, platform, limit):
     conn = get_connection()
-    query = "SELECT * FROM leads WHERE 1=1"
+    query = f"SELECT {columns} FROM leads WHERE 1=1"
     params = []
 
     if min_score is not None:
@@ -168,49 +380,46 @@ def get_leads(min_score=None, subreddit=None, date_from=None, contacted=None, pl
     params.append(limit)
 
     rows = conn.execute(query, params).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    return rows
 
 
 def get_platforms():
     """Get list of distinct platforms in the database."""
     conn = get_connection()
     rows = conn.execute("SELECT DISTINCT platform FROM leads ORDER BY platform").fetchall()
-    conn.close()
     return [r["platform"] for r in rows]
 
 
 def mark_contacted(lead_id):
     """Toggle contacted status for a lead."""
-    conn = get_connection()
-    conn.execute(
-        "UPDATE leads SET contacted = CASE WHEN contacted = 0 THEN 1 ELSE 0 END WHERE id = ?",
-        (lead_id,),
-    )
-    conn.commit()
-    conn.close()
+    conn = get_write_connection()
+    with conn:
+        conn.execute(
+            "UPDATE leads SET contacted = CASE WHEN contacted = 0 THEN 1 ELSE 0 END WHERE id = ?",
+            (lead_id,),
+        )
+    _bump_write_version()
 
 
+@ttl_cache(seconds=10)
 def get_subreddits():
     """Get list of distinct subreddits in the database."""
     conn = get_connection()
     rows = conn.execute("SELECT DISTINCT subreddit FROM leads ORDER BY subreddit").fetchall()
-    conn.close()
     return [r["subreddit"] for r in rows]
 
 
+@ttl_cache(seconds=10)
 def get_stats():
     """Get summary statistics."""
     conn = get_connection()
-    total = conn.execute("SELECT COUNT(*) as c FROM leads").fetchone()["c"]
-    high = conn.execute("SELECT COUNT(*) as c FROM leads WHERE intent_score >= 7").fetchone()["c"]
-    contacted = conn.execute("SELECT COUNT(*) as c FROM leads WHERE contacted = 1").fetchone()["c"]
-
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    today_count = conn.execute("SELECT COUNT(*) as c FROM leads WHERE found_at >= ?", (today,)).fetchone()["c"]
-
-    avg_row = conn.execute("SELECT AVG(intent_score) as a FROM leads").fetchone()
-    avg_score = round(avg_row["a"], 1) if avg_row["a"] else 0
+    total, high, contacted, today_count, avg = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(intent_score >= 7), 0), COALESCE(SUM(contacted = 1), 0), "
+        "COALESCE(SUM(found_at >= ?), 0), AVG(intent_score) FROM leads",
+        (today,),
+    ).fetchone()
+    avg_score = round(avg, 1) if avg else 0
 
     top_sub_row = conn.execute(
         "SELECT subreddit, COUNT(*) as c FROM leads GROUP BY subreddit ORDER BY c DESC LIMIT 1"
@@ -219,7 +428,6 @@ def get_stats():
 
     form_count = conn.execute("SELECT COUNT(*) as c FROM form_leads").fetchone()["c"]
 
-    conn.close()
     return {
         "total": total,
         "high_intent": high,
@@ -233,20 +441,30 @@ def get_stats():
 
 def add_to_queue(lead_id, reply_text, target_url):
     """Add a reply to the queue. Returns the new queue item id."""
-    conn = get_connection()
-    try:
+    conn = get_write_connection()
+    with conn:
         cur = conn.execute(
             "INSERT INTO reply_queue (lead_id, reply_text, target_url, status, created_at) VALUES (?, ?, ?, 'pending', ?)",
             (lead_id, reply_text, target_url, datetime.now(timezone.utc).isoformat()),
         )
-        conn.commit()
-        return cur.lastrowid
-    finally:
-        conn.close()
+    return cur.lastrowid
+
+
+def add_to_queue_bulk(items):
+    """Add many (lead_id, reply_text, target_url) replies to the queue in one transaction."""
+    if not items:
+        return
+    conn = get_write_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO reply_queue (lead_id, reply_text, target_url, status, created_at) VALUES (?, ?, ?, 'pending', ?)",
+            [(lead_id, reply_text, target_url, datetime.now(timezone.utc).isoformat())
+             for lead_id, reply_text, target_url in items],
+        )
 
 
 def get_queue_items(status=None, limit=100):
-    """Fetch queue items, optionally filtered by status."""
+    """Fetch queue items as sqlite3.Row objects, optionally filtered by status."""
     conn = get_connection()
     if status:
         rows = conn.execute(
@@ -262,100 +480,80 @@ def get_queue_items(status=None, limit=100):
             "ORDER BY CASE rq.status WHEN 'pending' THEN 0 WHEN 'approved' THEN 1 WHEN 'failed' THEN 2 WHEN 'posted' THEN 3 ELSE 4 END, rq.created_at DESC LIMIT ?",
             (limit,),
         ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    return rows
+
+
+def get_approved_queue_ids(limit=20):
+    """IDs of approved replies waiting to be posted, newest first."""
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT id FROM reply_queue WHERE status = 'approved' ORDER BY created_at DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    return [r[0] for r in rows]
 
 
 def update_queue_status(queue_id, status, error=None):
     """Update a queue item's status."""
-    conn = get_connection()
-    if error is not None:
-        conn.execute("UPDATE reply_queue SET status = ?, error_message = ? WHERE id = ?", (status, error, queue_id))
-    else:
-        conn.execute("UPDATE reply_queue SET status = ? WHERE id = ?", (status, queue_id))
-    conn.commit()
-    conn.close()
+    conn = get_write_connection()
+    with conn:
+        if error is not None:
+            conn.execute("UPDATE reply_queue SET status = ?, error_message = ? WHERE id = ?", (status, error, queue_id))
+        else:
+            conn.execute("UPDATE reply_queue SET status = ? WHERE id = ?", (status, queue_id))
 
 
 def get_queue_stats():
     """Get reply queue statistics."""
     conn = get_connection()
-    pending = conn.execute("SELECT COUNT(*) as c FROM reply_queue WHERE status = 'pending'").fetchone()["c"]
-    approved = conn.execute("SELECT COUNT(*) as c FROM reply_queue WHERE status = 'approved'").fetchone()["c"]
-    total_posted = conn.execute("SELECT COUNT(*) as c FROM reply_queue WHERE status = 'posted'").fetchone()["c"]
+    counts = dict(conn.execute("SELECT status, COUNT(*) FROM reply_queue GROUP BY status").fetchall())
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     posted_today = conn.execute("SELECT COUNT(*) as c FROM reply_queue WHERE status = 'posted' AND posted_at >= ?", (today,)).fetchone()["c"]
-    failed = conn.execute("SELECT COUNT(*) as c FROM reply_queue WHERE status = 'failed'").fetchone()["c"]
-    conn.close()
     return {
-        "pending": pending,
-        "approved": approved,
-        "total_posted": total_posted,
+        "pending": counts.get("pending", 0),
+        "approved": counts.get("approved", 0),
+        "total_posted": counts.get("posted", 0),
         "posted_today": posted_today,
-        "failed": failed,
+        "failed": counts.get("failed", 0),
     }
 
 
-def is_lead_queued(lead_id):
-    """Check if a lead already has a queue entry."""
-    conn = get_connection()
-    row = conn.execute("SELECT COUNT(*) as c FROM reply_queue WHERE lead_id = ?", (lead_id,)).fetchone()
-    conn.close()
-    return row["c"] > 0
-
-
 # --- Analytics queries ---
 
-def leads_by_day(days=30):
-    """Leads per day for the last N days."""
+def leads_breakdowns(days=30):
+    """All chart aggregates for the analytics page in one round trip.
+
+    Returns a dict of lists of row dicts:
+      by_day:       {"day", "count"} per day over the last `days` days, oldest first
+      by_subreddit: {"subreddit", "count"} for the top 20 subreddits, most leads first
+      score_dist:   {"score", "count"} per intent score, ascending
+      by_platform:  {"platform", "count"} per platform, most leads first
+      by_hour:      {"hour", "count"} per hour of day (0-23), ascending
+    """
     conn = get_connection()
     cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d")
     rows = conn.execute(
-        "SELECT DATE(found_at) as day, COUNT(*) as count FROM leads WHERE found_at >= ? GROUP BY day ORDER BY day",
+        "SELECT 'day' as metric, DATE(found_at) as k, COUNT(*) as v FROM leads WHERE found_at >= ? GROUP BY k "
+        "UNION ALL SELECT 'subreddit', subreddit, COUNT(*) FROM leads GROUP BY subreddit "
+        "UNION ALL SELECT 'score', intent_score, COUNT(*) FROM leads GROUP BY intent_score "
+        "UNION ALL SELECT 'platform', platform, COUNT(*) FROM leads GROUP BY platform "
+        "UNION ALL SELECT 'hour', CAST(strftime('%H', found_at) AS INTEGER), COUNT(*) FROM leads GROUP BY 2 "
+        "ORDER BY 1, 2",
         (cutoff,),
     ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
-
-
-def leads_by_subreddit():
-    """Lead count per subreddit."""
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT subreddit, COUNT(*) as count FROM leads GROUP BY subreddit ORDER BY count DESC LIMIT 20"
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
-
-
-def leads_score_distribution():
-    """Count of leads at each score level 1-10."""
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT intent_score as score, COUNT(*) as count FROM leads GROUP BY intent_score ORDER BY intent_score"
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
-
-
-def leads_by_platform():
-    """Lead count per platform."""
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT platform, COUNT(*) as count FROM leads GROUP BY platform ORDER BY count DESC"
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
-
 
-def leads_by_hour():
-    """Lead count by hour of day (0-23)."""
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT CAST(strftime('%H', found_at) AS INTEGER) as hour, COUNT(*) as count FROM leads GROUP BY hour ORDER BY hour"
-    ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+    parts = {"day": [], "subreddit": [], "score": [], "platform": [], "hour": []}
+    for metric, k, v in rows:
+        parts[metric].append((k, v))
+    return {
+        "by_day": [{"day": k, "count": v} for k, v in parts["day"]],
+        "by_subreddit": [
+            {"subreddit": k, "count": v} for k, v in sorted(parts["subreddit"], key=lambda x: -x[1])[:20]
+        ],
+        "score_dist": [{"score": k, "count": v} for k, v in parts["score"]],
+        "by_platform": [{"platform": k, "count": v} for k, v in sorted(parts["platform"], key=lambda x: -x[1])],
+        "by_hour": [{"hour": k, "count": v} for k, v in parts["hour"]],
+    }
 
 
 def leads_by_keyword():
@@ -363,7 +561,6 @@ def leads_by_keyword():
     from config import KEYWORDS
     conn = get_connection()
     all_content = conn.execute("SELECT content FROM leads").fetchall()
-    conn.close()
     counts = {}
     for row in all_content:
         c = row["content"].lower()
@@ -404,8 +601,6 @@ def get_analytics_stats():
     month_start = now.strftime("%Y-%m-01")
     leads_this_month = conn.execute("SELECT COUNT(*) as c FROM leads WHERE found_at >= ?", (month_start,)).fetchone()["c"]
 
-    conn.close()
-
     week_change = 0
     if last_week > 0:
         week_change = round((this_week - last_week) / last_week * 100, 1)
@@ -422,5 +617,4 @@ def get_analytics_stats():
     }
 
 
-# Auto-init on import
-init_db()
+atexit.register(close_all)
@@ -16,10 +16,19 @@ import os
 import re
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
 from config import KEYWORDS, MIN_SCORE_THRESHOLD, REQUEST_DELAY, PROFILE_FB_GROUPS, PROFILE_WEB_QUERIES
-from db import insert_lead
+from db import get_known_urls, get_platform_urls, insert_leads_bulk
+from keyword_match import KeywordMatcher
+from reliability import RateLimiter
 
 # Import location/scoring helpers
 try:
@@ -31,6 +40,12 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger("facebook")
 
+# Keywords and locations in one matcher so each post is scanned once
+_FB_MATCHER = KeywordMatcher(
+    [(kw, ("keyword", kw, weight)) for kw, weight in KEYWORDS.items()]
+    + [(loc, ("location", loc, LOCATION_SCORE_BOOST)) for loc in TARGET_LOCATIONS]
+)
+
 # Facebook groups from active profile
 CO_FACEBOOK_GROUPS = PROFILE_FB_GROUPS or []
 
@@ -48,6 +63,13 @@ GOOGLE_FB_QUERIES = [
     'site:facebook.com/groups "basement finish" "Colorado"',
 ]
 
+# Google result parsing, compiled once
+_HREF_RE = re.compile(r'href="(https?://(?:www\.)?facebook\.com/groups/[^"]+)"')
+_SPAN_RE = re.compile(r'<span[^>]*>([^<]{30,300})</span>')
+_TAG_RE = re.compile(r'<[^>]+>')
+_GROUP_RE = re.compile(r'groups/([^/?]+)')
+_FB_GROUP_URL_RE = re.compile(r'https?://(?:www\.)?facebook\.com/groups/')
+
 session = requests.Session()
 session.headers.update({
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
@@ -55,6 +77,9 @@ session.headers.update({
     "Accept-Language": "en-US,en;q=0.9",
 })
 
+# Google searches from every worker share one pace, REQUEST_DELAY * 2 apart
+_google_limiter = RateLimiter(REQUEST_DELAY * 2)
+
 
 # Seller/advertiser signals — these people are SELLING, not BUYING services
 SELLER_SIGNALS = [
@@ -82,6 +107,19 @@ FB_NEGATIVE_KEYWORDS = [
 ]
 
 
+# URLs of stored Facebook leads, loaded once and refreshed hourly so repeat
+# scans can skip already-stored posts before scoring or touching the DB
+_STORED_URLS_TTL = 3600
+_stored_urls = {"urls": None, "loaded_at": 0.0}
+
+
+def _stored_fb_urls():
+    if _stored_urls["urls"] is None or time.time() - _stored_urls["loaded_at"] > _STORED_URLS_TTL:
+        _stored_urls["urls"] = get_platform_urls("facebook")
+        _stored_urls["loaded_at"] = time.time()
+    return _stored_urls["urls"]
+
+
 def score_fb_post(text):
     """Score a Facebook post for remodeling intent.
     
@@ -99,10 +137,8 @@ def score_fb_post(text):
     if seller_hits >= 2:
         return 0, []
 
-    matches = []
-    for keyword, weight in KEYWORDS.items():
-        if keyword in text_lower:
-            matches.append((keyword, weight))
+    hits = _FB_MATCHER.find(text_lower)
+    matches = [(term, weight) for kind, term, weight in hits if kind == "keyword"]
 
     if not matches:
         return 0, []  # No keyword match = no lead (removed free base score)
@@ -112,11 +148,10 @@ def score_fb_post(text):
     score = best + bonus
 
     # Location boost (no +2 freebie anymore — earn the score)
-    for loc in TARGET_LOCATIONS:
-        if loc in text_lower:
-            matches.append((f"📍 {loc}", LOCATION_SCORE_BOOST))
-            score = min(score + LOCATION_SCORE_BOOST, 10)
-            break
+    locations = [term for kind, term, _ in hits if kind == "location"]
+    if locations:
+        matches.append((f"📍 {locations[0]}", LOCATION_SCORE_BOOST))
+        score = min(score + LOCATION_SCORE_BOOST, 10)
 
     matches.append(("📘 facebook", 0))
     return min(score, 10), matches
@@ -154,14 +189,17 @@ def run_apify_scan(api_token):
         "sortBy": "CHRONOLOGICAL",  # most recent first
     }
 
-    headers = {
+    # One keep-alive session for the start, poll and fetch calls
+    apify_session = requests.Session()
+    apify_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    apify_session.headers.update({
         "Authorization": f"Bearer {api_token}",
         "Content-Type": "application/json",
-    }
+    })
 
     try:
         log.info("  Starting Apify actor run...")
-        resp = requests.post(run_url, json=payload, headers=headers, timeout=30)
+        resp = apify_session.post(run_url, json=payload, timeout=30)
         resp.raise_for_status()
         run_data = resp.json().get("data", {})
         run_id = run_data.get("id")
@@ -170,11 +208,13 @@ def run_apify_scan(api_token):
             log.warning("  Failed to start Apify run")
             return 0
 
-        # Poll for completion (max 5 minutes)
+        # Poll for completion (max 5 minutes), backing off 1s -> 2s -> ... -> 15s
         status_url = f"https://api.apify.com/v2/actor-runs/{run_id}"
-        for _ in range(30):  # 30 * 10s = 5 min
-            time.sleep(10)
-            status_resp = requests.get(status_url, headers=headers, timeout=15)
+        delay = 1.0
+        deadline = time.time() + 300
+        while time.time() < deadline:
+            time.sleep(delay)
+            status_resp = apify_session.get(status_url, timeout=15)
             status = status_resp.json().get("data", {}).get("status", "")
             if status == "SUCCEEDED":
                 break
@@ -182,6 +222,7 @@ def run_apify_scan(api_token):
                 log.warning(f"  Apify run {status}")
                 return 0
             log.debug(f"  Apify run status: {status}")
+            delay = min(delay * 2, 15)
 
         # Fetch results
         dataset_id = run_data.get("defaultDatasetId")
@@ -190,11 +231,21 @@ def run_apify_scan(api_token):
             return 0
 
         items_url = f"https://api.apify.com/v2/datasets/{dataset_id}/items"
-        items_resp = requests.get(items_url, headers=headers, timeout=30)
+        items_resp = apify_session.get(items_url, timeout=30)
         items = items_resp.json() if items_resp.status_code == 200 else []
 
         log.info(f"  Got {len(items)} posts from Apify")
 
+        # Posts already stored (their comments share the post URL) need no scoring.
+        # Misses in the in-process set are confirmed against the DB in one query.
+        known_urls = _stored_fb_urls()
+        known_urls.update(get_known_urls(
+            url for url in (item.get("url", "") or item.get("postUrl", "") for item in items)
+            if url not in known_urls
+        ))
+
+        # Collect every qualifying post and comment, then insert in one transaction
+        pending = []
         for item in items:
             text = item.get("text", "") or item.get("message", "") or ""
             post_url = item.get("url", "") or item.get("postUrl", "")
@@ -202,6 +253,8 @@ def run_apify_scan(api_token):
             timestamp = item.get("time", "") or item.get("timestamp", "")
             group_name = item.get("groupName", "Facebook Group")
 
+            if post_url in known_urls:
+                continue
             if not text or len(text) < 15:
                 continue
 
@@ -211,19 +264,17 @@ def run_apify_scan(api_token):
 
             ts = timestamp if timestamp else datetime.now(timezone.utc).isoformat()
 
-            inserted = insert_lead(
+            pending.append((
                 "facebook",
                 author[:100],
-                text[:2000],
+                text,
                 post_url or f"https://facebook.com/groups/{group_name}",
                 f"fb/{group_name[:50]}",
                 score,
                 ts,
-            )
-            if inserted:
-                match_str = ", ".join(k for k, _ in matches)
-                log.info(f"  Lead: {author} in {group_name} (score={score}) — {match_str}")
-                total += 1
+            ))
+            match_str = ", ".join(k for k, _ in matches)
+            log.info(f"  Candidate: {author} in {group_name} (score={score}) — {match_str}")
 
             # Also check comments
             comments = item.get("topComments", []) or []
@@ -235,17 +286,19 @@ def run_apify_scan(api_token):
                 c_score, c_matches = score_fb_post(c_text)
                 if c_score < MIN_SCORE_THRESHOLD:
                     continue
-                inserted = insert_lead(
+                pending.append((
                     "facebook",
                     c_author[:100],
-                    c_text[:2000],
+                    c_text,
                     post_url or f"https://facebook.com/groups/{group_name}",
                     f"fb/{group_name[:50]}",
                     c_score,
                     ts,
-                )
-                if inserted:
-                    total += 1
+                ))
+
+        total = insert_leads_bulk(pending)
+        known_urls.update(row[3] for row in pending)
+        log.info(f"  Inserted {total} new leads from {len(pending)} candidates")
 
     except Exception as e:
         log.warning(f"  Apify scan error: {e}")
@@ -260,65 +313,96 @@ def run_apify_scan(api_token):
     return total
 
 
+def _nearest_snippet(link):
+    """Text of the first plain <span> (30-300 chars) in the link's surrounding result block."""
+    node = link
+    for _ in range(4):
+        node = node.getparent()
+        # Stop before climbing into a block that holds other results' links
+        if node is None or node.xpath('count(.//a[contains(@href, "facebook.com/groups/")])') > 1:
+            break
+        for span in node.iter("span"):
+            if len(span) == 0 and span.text and 30 <= len(span.text) <= 300:
+                return span.text
+    return ""
+
+
+def _extract_fb_links(resp):
+    """Return (fb_url, snippet) pairs from a Google results page."""
+    if lxml_html is None:
+        # Regex fallback: pair links and snippets by position
+        links = _HREF_RE.findall(resp.text)
+        snippets = _SPAN_RE.findall(resp.text)
+        return [(url, snippets[i] if i < len(snippets) else "") for i, url in enumerate(links)]
+
+    tree = lxml_html.fromstring(resp.content)
+    return [
+        (a.get("href"), _nearest_snippet(a))
+        for a in tree.xpath('//a[contains(@href, "facebook.com/groups/")]')
+        if _FB_GROUP_URL_RE.match(a.get("href"))
+    ]
+
+
+def _fetch_and_parse(query):
+    """Run one Google query; return (fb_url, snippet, group_name) tuples."""
+    results = []
+    try:
+        url = f"https://www.google.com/search?q={requests.utils.quote(query)}&num=15"
+        _google_limiter.wait()
+        resp = session.get(url, timeout=15)
+        if resp.status_code != 200:
+            log.debug(f"  Google returned {resp.status_code}")
+        else:
+            for fb_url, snippet in _extract_fb_links(resp)[:15]:
+                snippet = _TAG_RE.sub('', snippet).strip()
+
+                # Extract group name from URL
+                group_match = _GROUP_RE.search(fb_url)
+                group_name = group_match.group(1) if group_match else "unknown"
+                results.append((fb_url, snippet, group_name))
+
+    except Exception as e:
+        log.debug(f"  Google FB search error: {e}")
+    return results
+
+
 def run_google_fb_scan():
     """Fallback: Search Google for public Facebook group posts about remodeling in CO."""
     log.info(f"Scanning Facebook groups via Google search ({len(GOOGLE_FB_QUERIES)} queries)...")
-    total = 0
+    stored_urls = _stored_fb_urls()
     seen_urls = set()
+    pending = []
 
-    for query in GOOGLE_FB_QUERIES:
-        try:
-            url = f"https://www.google.com/search?q={requests.utils.quote(query)}&num=15"
-            resp = session.get(url, timeout=15)
-            if resp.status_code != 200:
-                log.debug(f"  Google returned {resp.status_code}")
-                time.sleep(REQUEST_DELAY * 2)
-                continue
-
-            # Extract Facebook links and snippets
-            links = re.findall(r'href="(https?://(?:www\.)?facebook\.com/groups/[^"]+)"', resp.text)
-            # Get text snippets near those links
-            snippets = re.findall(r'<span[^>]*>([^<]{30,300})</span>', resp.text)
-
-            for i, fb_url in enumerate(links[:15]):
-                if fb_url in seen_urls:
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        for results in ex.map(_fetch_and_parse, GOOGLE_FB_QUERIES):
+            for fb_url, snippet, group_name in results:
+                if fb_url in seen_urls or fb_url in stored_urls:
                     continue
                 seen_urls.add(fb_url)
 
-                snippet = snippets[i] if i < len(snippets) else ""
-                snippet = re.sub(r'<[^>]+>', '', snippet).strip()
-
                 if not snippet or len(snippet) < 20:
                     continue
 
-                # Extract group name from URL
-                group_match = re.search(r'groups/([^/?]+)', fb_url)
-                group_name = group_match.group(1) if group_match else "unknown"
-
                 score, matches = score_fb_post(snippet)
                 if score < MIN_SCORE_THRESHOLD:
                     continue
 
                 ts = datetime.now(timezone.utc).isoformat()
-                inserted = insert_lead(
+                pending.append((
                     "facebook",
                     f"fb/{group_name}",
-                    snippet[:2000],
+                    snippet,
                     fb_url,
                     f"fb/{group_name[:50]}",
                     score,
                     ts,
-                )
-                if inserted:
-                    match_str = ", ".join(k for k, _ in matches)
-                    log.info(f"  Lead: fb/{group_name} (score={score}) — {match_str}")
-                    total += 1
-
-        except Exception as e:
-            log.debug(f"  Google FB search error: {e}")
-
-        time.sleep(REQUEST_DELAY * 2)
+                ))
+                match_str = ", ".join(k for k, _ in matches)
+                log.info(f"  Candidate: fb/{group_name} (score={score}) — {match_str}")
 
+    total = insert_leads_bulk(pending)
+    stored_urls.update(row[3] for row in pending)
+    log.info(f"  Inserted {total} new leads from {len(pending)} candidates")
     return total
 
 
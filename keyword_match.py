@@ -0,0 +1,51 @@
+"""Multi-term substring matching for keyword scoring.
+
+Uses an Aho-Corasick automaton (pyahocorasick) when installed so a text is
+scanned once regardless of how many terms there are; otherwise falls back
+to one `in` check per term.
+"""
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+class KeywordMatcher:
+    """Find which of a fixed list of (term, value) pairs occur in a text.
+
+    Results keep the order the pairs were given in, so callers see the same
+    ordering as a plain loop over the original list.
+    """
+
+    def __init__(self, items):
+        self._items = [(term, value) for term, value in items]
+        self._automaton = None
+        if ahocorasick is not None and self._items:
+            positions = {}
+            for i, (term, _) in enumerate(self._items):
+                positions.setdefault(term, []).append(i)
+            automaton = ahocorasick.Automaton()
+            for term, idxs in positions.items():
+                automaton.add_word(term, tuple(idxs))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find(self, text):
+        """Values of every term found in text, in input order."""
+        if self._automaton is None:
+            return [value for term, value in self._items if term in text]
+        hits = set()
+        for _, idxs in self._automaton.iter(text):
+            hits.update(idxs)
+        return [self._items[i][1] for i in sorted(hits)]
+
+    def search(self, text):
+        """Value of the first term (in input order) found in text, or None."""
+        if self._automaton is None:
+            for term, value in self._items:
+                if term in text:
+                    return value
+            return None
+        found = self.find(text)
+        return found[0] if found else None
@@ -1,98 +1,278 @@
 """Email and webhook notification system for lead alerts."""
 
+import atexit
 import json
+from html import escape
 import logging
+import queue
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import threading
+import time
+from base64 import encodebytes
+from email.header import Header
 
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import (
     SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, NOTIFY_EMAIL, WEBHOOK_URL,
 )
+from reliability import CircuitBreaker
 
 log = logging.getLogger("notifications")
 
+# One logged-in SMTP connection shared by every alert; reopened on demand
+_smtp_conn = None
+_smtp_lock = threading.Lock()
+
+# While a target keeps failing, alerts skip it instead of waiting on timeouts
+_smtp_breaker = CircuitBreaker("smtp")
+_webhook_breaker = CircuitBreaker("webhook")
+
+# Static headers of every alert email; only Subject and the body vary
+_MSG_PREFIX = (
+    f"From: {SMTP_USER}\r\n"
+    f"To: {NOTIFY_EMAIL}\r\n"
+    "MIME-Version: 1.0\r\n"
+    "Content-Type: text/html; charset=utf-8\r\n"
+    "Content-Transfer-Encoding: base64\r\n"
+)
+
+# Keep-alive session for the webhook host; Discord wants "content", Slack "text"
+_session = requests.Session()
+_session.headers.update({"Content-Type": "application/json"})
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+_is_discord = "discord" in (WEBHOOK_URL or "").lower()
+
 
 def _smtp_configured():
     return all([SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, NOTIFY_EMAIL])
 
 
+def _get_smtp():
+    """Return the shared SMTP connection, connecting and logging in if needed. Call with _smtp_lock held."""
+    global _smtp_conn
+    if _smtp_conn is None:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=15)
+        server.starttls()
+        server.login(SMTP_USER, SMTP_PASS)
+        _smtp_conn = server
+    return _smtp_conn
+
+
+def _drop_smtp():
+    """Discard the shared SMTP connection. Call with _smtp_lock held."""
+    global _smtp_conn
+    if _smtp_conn is not None:
+        try:
+            _smtp_conn.close()
+        except Exception:
+            pass
+        _smtp_conn = None
+
+
+def _close_smtp():
+    with _smtp_lock:
+        if _smtp_conn is not None:
+            try:
+                _smtp_conn.quit()
+            except Exception:
+                pass
+        _drop_smtp()
+
+
+atexit.register(_close_smtp)
+
+
 def _send_email(subject, html_body):
     """Send an HTML email via SMTP. Fails silently with a log warning."""
     if not _smtp_configured():
         log.info(f"SMTP not configured — skipping email: {subject}")
         return False
+    if not _smtp_breaker.allow():
+        log.warning(f"SMTP unavailable — skipping email: {subject}")
+        return False
     try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = SMTP_USER
-        msg["To"] = NOTIFY_EMAIL
-        msg.attach(MIMEText(html_body, "html"))
-
-        with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=15) as server:
-            server.starttls()
-            server.login(SMTP_USER, SMTP_PASS)
-            server.sendmail(SMTP_USER, [NOTIFY_EMAIL], msg.as_string())
+        # Subject is RFC 2047-encoded and the body base64'd so the message is pure ASCII
+        subject_header = Header(subject, "utf-8").encode(linesep="\r\n")
+        body = encodebytes(html_body.encode("utf-8")).decode("ascii").replace("\n", "\r\n")
+        msg = (
+            _MSG_PREFIX
+            + f"Subject: {subject_header}\r\n\r\n"
+            + body
+        ).encode("ascii")
+
+        with _smtp_lock:
+            reused = _smtp_conn is not None
+            try:
+                _get_smtp().sendmail(SMTP_USER, [NOTIFY_EMAIL], msg)
+            except OSError as e:
+                # smtplib errors are OSErrors too; a refused message isn't a
+                # connection problem, so don't reconnect or resend for it
+                if isinstance(e, smtplib.SMTPException) and not isinstance(e, smtplib.SMTPServerDisconnected):
+                    raise
+                _drop_smtp()
+                if not reused:
+                    raise
+                # Server dropped the idle cached connection — reconnect once
+                _get_smtp().sendmail(SMTP_USER, [NOTIFY_EMAIL], msg)
+        _smtp_breaker.record_success()
         log.info(f"Email sent: {subject}")
         return True
     except Exception as e:
+        _smtp_breaker.record_failure()
         log.warning(f"Failed to send email: {e}")
         return False
 
 
 def _send_webhook(text):
     """Send a notification to Slack/Discord webhook. Fails silently."""
-    if not WEBHOOK_URL:
+    if not WEBHOOK_URL or not _webhook_breaker.allow():
         return False
     try:
-        payload = {"content": text} if "discord" in WEBHOOK_URL.lower() else {"text": text}
-        resp = requests.post(WEBHOOK_URL, json=payload, timeout=10)
+        payload = {"content": text} if _is_discord else {"text": text}
+        resp = _session.post(WEBHOOK_URL, json=payload, timeout=10)
         resp.raise_for_status()
+        _webhook_breaker.record_success()
         log.info("Webhook notification sent")
         return True
     except Exception as e:
+        _webhook_breaker.record_failure()
         log.warning(f"Webhook failed: {e}")
         return False
 
 
-def notify_high_intent_lead(username, subreddit, score, content, url):
-    """Notify when a high-intent lead (score >= 8) is found."""
-    subject = f"🔥 High-Intent Lead (Score {score}) — u/{username}"
-    html = f"""
+# Alerts are handed to a background worker so scans and form posts never
+# wait on SMTP/webhook I/O. Emails arriving within _BATCH_WINDOW seconds of
+# each other go out as one message (they all share NOTIFY_EMAIL).
+_BATCH_WINDOW = 2.0
+_BATCH_MAX = 20
+_notify_q = queue.Queue(maxsize=500)
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _dispatch(batch):
+    for job in batch:
+        _send_webhook(job["webhook"])
+    if len(batch) == 1:
+        _send_email(batch[0]["subject"], batch[0]["html"])
+    else:
+        subject = f"{len(batch)} new alerts — {batch[0]['subject']}"
+        _send_email(subject, '<hr style="margin:24px 0">'.join(job["html"] for job in batch))
+
+
+def _notify_worker():
+    while True:
+        batch = [_notify_q.get()]
+        deadline = time.monotonic() + _BATCH_WINDOW
+        while len(batch) < _BATCH_MAX:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_notify_q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            _dispatch(batch)
+        except Exception as e:
+            log.warning(f"Notification dispatch failed: {e}")
+        finally:
+            for _ in batch:
+                _notify_q.task_done()
+
+
+def _enqueue(job):
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_notify_worker, daemon=True, name="notifications")
+                _worker.start()
+    try:
+        _notify_q.put_nowait(job)
+    except queue.Full:
+        log.warning(f"Notification queue full — dropping: {job['subject']}")
+
+
+def _flush(timeout=10):
+    """Give queued alerts a chance to go out before the process exits."""
+    deadline = time.monotonic() + timeout
+    while _notify_q.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+
+# Registered after _close_smtp so it runs first at exit (atexit is LIFO)
+atexit.register(_flush)
+
+
+# Alert bodies, filled with str.format_map per notification. Every value is
+# HTML-escaped first: usernames, post text and form fields are user-controlled.
+_LEAD_HTML = """
     <div style="font-family:sans-serif;max-width:600px;margin:0 auto">
       <h2 style="color:#b8860b">⛏️ Gold Rush Scanner — High-Intent Lead</h2>
       <table style="width:100%;border-collapse:collapse">
         <tr><td style="padding:8px;font-weight:bold;color:#666">User</td><td style="padding:8px"><a href="https://reddit.com/u/{username}">u/{username}</a></td></tr>
         <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Score</td><td style="padding:8px"><strong style="color:#2a5">{score}/10</strong></td></tr>
         <tr><td style="padding:8px;font-weight:bold;color:#666">Subreddit</td><td style="padding:8px">r/{subreddit}</td></tr>
-        <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Content</td><td style="padding:8px">{content[:500]}</td></tr>
+        <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Content</td><td style="padding:8px">{content}</td></tr>
         <tr><td style="padding:8px;font-weight:bold;color:#666">Link</td><td style="padding:8px"><a href="{url}">{url}</a></td></tr>
       </table>
       <p style="margin-top:16px;color:#999;font-size:12px">Sent by Gold Rush Scanner</p>
     </div>
-    """
-    _send_email(subject, html)
-    _send_webhook(f"🔥 High-intent lead (score {score}): u/{username} in r/{subreddit} — {url}")
-
+"""
 
-def notify_form_submission(name, email, phone, interest, budget, referral_source):
-    """Notify when a form submission comes in."""
-    subject = f"📋 New Form Lead — {name} ({email})"
-    html = f"""
+_FORM_HTML = """
     <div style="font-family:sans-serif;max-width:600px;margin:0 auto">
       <h2 style="color:#b8860b">⛏️ Gold Rush Scanner — New Form Submission</h2>
       <table style="width:100%;border-collapse:collapse">
         <tr><td style="padding:8px;font-weight:bold;color:#666">Name</td><td style="padding:8px">{name}</td></tr>
         <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Email</td><td style="padding:8px"><a href="mailto:{email}">{email}</a></td></tr>
-        <tr><td style="padding:8px;font-weight:bold;color:#666">Phone</td><td style="padding:8px">{phone or '—'}</td></tr>
-        <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Interest</td><td style="padding:8px">{interest or '—'}</td></tr>
-        <tr><td style="padding:8px;font-weight:bold;color:#666">Budget</td><td style="padding:8px">{budget or '—'}</td></tr>
-        <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Source</td><td style="padding:8px">{referral_source or '—'}</td></tr>
+        <tr><td style="padding:8px;font-weight:bold;color:#666">Phone</td><td style="padding:8px">{phone}</td></tr>
+        <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Interest</td><td style="padding:8px">{interest}</td></tr>
+        <tr><td style="padding:8px;font-weight:bold;color:#666">Budget</td><td style="padding:8px">{budget}</td></tr>
+        <tr style="background:#f9f9f9"><td style="padding:8px;font-weight:bold;color:#666">Source</td><td style="padding:8px">{referral_source}</td></tr>
       </table>
       <p style="margin-top:16px;color:#999;font-size:12px">Sent by Gold Rush Scanner</p>
     </div>
-    """
-    _send_email(subject, html)
-    _send_webhook(f"📋 New form lead: {name} ({email}) — Interest: {interest}, Budget: {budget}")
+"""
+
+
+def notify_high_intent_lead(username, subreddit, score, content, url):
+    """Notify when a high-intent lead (score >= 8) is found."""
+    subject = f"🔥 High-Intent Lead (Score {score}) — u/{username}"
+    fields = {
+        "username": username,
+        "score": score,
+        "subreddit": subreddit,
+        "content": content[:500],
+        "url": url,
+    }
+    html = _LEAD_HTML.format_map({k: escape(str(v)) for k, v in fields.items()})
+    _enqueue({
+        "kind": "lead",
+        "subject": subject,
+        "html": html,
+        "webhook": f"🔥 High-intent lead (score {score}): u/{username} in r/{subreddit} — {url}",
+    })
+
+
+def notify_form_submission(name, email, phone, interest, budget, referral_source):
+    """Notify when a form submission comes in."""
+    subject = f"📋 New Form Lead — {name} ({email})"
+    fields = {
+        "name": name,
+        "email": email,
+        "phone": phone,
+        "interest": interest,
+        "budget": budget,
+        "referral_source": referral_source,
+    }
+    html = _FORM_HTML.format_map({k: escape(v or "—") for k, v in fields.items()})
+    _enqueue({
+        "kind": "form",
+        "subject": subject,
+        "html": html,
+        "webhook": f"📋 New form lead: {name} ({email}) — Interest: {interest}, Budget: {budget}",
+    })
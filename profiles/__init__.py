@@ -1 +1,19 @@
 # Industry profiles for Social Prospector
+import functools
+import importlib
+import os
+
+DEFAULT_PROFILE = "remodeling_colorado"
+
+
+@functools.lru_cache(maxsize=1)
+def active():
+    """Return the profile module named by INDUSTRY_PROFILE, imported once per process."""
+    name = os.environ.get("INDUSTRY_PROFILE", DEFAULT_PROFILE)
+    try:
+        profile = importlib.import_module(f"profiles.{name}")
+        print(f"📋 Loaded profile: {getattr(profile, 'PROFILE_NAME', name)}")
+    except ImportError:
+        print(f"⚠️ Profile '{name}' not found in profiles/, falling back to {DEFAULT_PROFILE}")
+        profile = importlib.import_module(f"profiles.{DEFAULT_PROFILE}")
+    return profile
@@ -0,0 +1,76 @@
+"""Failure handling shared by the outbound integrations (Reddit, SMTP, webhooks)."""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger("reliability")
+
+
+class CircuitBreaker:
+    """Stop calling a remote target that keeps failing.
+
+    CLOSED: calls go through. After `threshold` consecutive failures the
+    breaker opens and allow() returns False for `recovery` seconds. After
+    that one trial call is let through (half-open): success closes the
+    breaker, failure opens it for another window.
+    """
+
+    def __init__(self, name, threshold=10, recovery=60):
+        self.name = name
+        self.threshold = threshold
+        self.recovery = recovery
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """True if a call to the target should be attempted now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.recovery:
+                return False
+            # Let one trial call through; the rest wait out another window
+            self._opened_at = now
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                log.info(f"{self.name}: recovered, circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self._opened_at is None and self._failures >= self.threshold):
+                log.warning(f"{self.name}: {self._failures} consecutive failures, pausing calls for {self.recovery}s")
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class RateLimiter:
+    """Space calls at least `interval` seconds apart across all threads.
+
+    Each wait() reserves the next free slot under the lock and sleeps outside
+    it, so concurrent callers queue up in order instead of all firing at once.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
@@ -1,7 +1,9 @@
 """Reddit reply approval queue with PRAW integration and rate limiting."""
 
+import functools
 import logging
 import random
+import re
 import threading
 import time
 from datetime import datetime, timezone
@@ -10,13 +12,24 @@ from config import (
     REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET,
     REDDIT_USERNAME, REDDIT_PASSWORD,
 )
-from db import add_to_queue, get_queue_items, update_queue_status
+from db import add_to_queue, get_approved_queue_ids, get_write_connection, update_queue_status
+from reliability import CircuitBreaker
 
 log = logging.getLogger("reply_queue")
 
 _reddit = None
 _poster_thread = None
 _poster_running = False
+_wake = threading.Event()  # set by approve_reply() so the idle poster doesn't wait out its poll
+_POST_BATCH = 20
+_NOT_APPROVED = "Queue item is no longer approved"
+_MAX_POST_ATTEMPTS = 5
+_REDDIT_UNAVAILABLE = "Reddit is unavailable, will retry later"
+# Opens after repeated outage errors so approved replies wait instead of all failing
+_reddit_breaker = CircuitBreaker("reddit")
+
+# .../comments/<post_id>/<slug>/<comment_id>/ -- group 1 is the comment ID
+_COMMENT_PERMALINK_RE = re.compile(r"/comments/[a-z0-9]+/[^/]*/([a-z0-9]+)/?(?:[?#]|$)", re.I)
 
 
 def _get_reddit():
@@ -45,6 +58,38 @@ def _get_reddit():
         return None
 
 
+@functools.lru_cache(maxsize=1)
+def _transient_errors():
+    """prawcore errors worth retrying: rate limits, 5xx and network failures."""
+    try:
+        from prawcore.exceptions import RequestException, ServerError, TooManyRequests
+    except ImportError:
+        return ()
+    return (RequestException, ServerError, TooManyRequests)
+
+
+def _post_with_retry(reply, text):
+    """Call reply(text), retrying transient Reddit errors with full-jitter backoff.
+
+    Anything else (bad credentials, forbidden, deleted/locked thread) is raised
+    on the first attempt so the item is marked failed straight away.
+    """
+    transient = _transient_errors()
+    for attempt in range(_MAX_POST_ATTEMPTS):
+        try:
+            return reply(text)
+        except transient as e:
+            if attempt == _MAX_POST_ATTEMPTS - 1:
+                raise
+            delay = random.uniform(0, min(60, 2 * 2 ** attempt))
+            # Honour Retry-After on 429s when Reddit sends one
+            retry_after = getattr(getattr(e, "response", None), "headers", {}).get("retry-after", "")
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            log.warning(f"Reddit error ({e}), retrying in {delay:.1f}s ({attempt + 1}/{_MAX_POST_ATTEMPTS})")
+            time.sleep(delay)
+
+
 def reddit_configured():
     """Check if Reddit credentials are set."""
     return all([REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USERNAME, REDDIT_PASSWORD])
@@ -58,6 +103,7 @@ def queue_reply(lead_id, reply_text, target_url):
 def approve_reply(queue_id):
     """Mark a queued reply as approved (ready for posting)."""
     update_queue_status(queue_id, "approved")
+    _wake.set()
 
 
 def skip_reply(queue_id):
@@ -67,52 +113,54 @@ def skip_reply(queue_id):
 
 def post_reply(queue_id):
     """Post an approved reply to Reddit via PRAW."""
-    from db import get_connection
-    conn = get_connection()
-    item = conn.execute("SELECT * FROM reply_queue WHERE id = ?", (queue_id,)).fetchone()
-    conn.close()
+    # One pooled connection for both the lookup and the status update
+    conn = get_write_connection()
+    item = conn.execute(
+        "SELECT target_url, reply_text, status FROM reply_queue WHERE id = ?", (queue_id,)
+    ).fetchone()
 
     if not item:
         return False, "Queue item not found"
+    url, reply_text, status = item
+    if status != "approved":
+        # Skipped or edited since the poster fetched its batch
+        return False, _NOT_APPROVED
 
     reddit = _get_reddit()
     if not reddit:
         update_queue_status(queue_id, "failed", error="Reddit credentials not configured")
         return False, "Reddit credentials not configured"
 
-    try:
-        url = item["target_url"]
-        reply_text = item["reply_text"]
+    if not _reddit_breaker.allow():
+        return False, _REDDIT_UNAVAILABLE
 
+    try:
         # Determine if it's a comment or post
-        import praw
         if "/comments/" in url:
-            # Extract the thing from URL
-            submission = reddit.submission(url=url)
-            # If URL has a specific comment ID (has extra path after post title)
-            parts = url.rstrip("/").split("/")
-            if len(parts) > 8 and parts[-2] not in ("comments",):
-                # It's a comment permalink
-                comment_id = parts[-1]
-                comment = reddit.comment(id=comment_id)
-                comment.reply(reply_text)
+            m = _COMMENT_PERMALINK_RE.search(url)
+            if m:
+                # It's a comment permalink (extra ID after the post title)
+                _post_with_retry(reddit.comment(id=m.group(1)).reply, reply_text)
             else:
                 # It's a post
-                submission.reply(reply_text)
+                _post_with_retry(reddit.submission(url=url).reply, reply_text)
 
         now = datetime.now(timezone.utc).isoformat()
-        from db import get_connection as gc
-        conn = gc()
-        conn.execute(
-            "UPDATE reply_queue SET status = 'posted', posted_at = ?, error_message = '' WHERE id = ?",
-            (now, queue_id),
-        )
-        conn.commit()
-        conn.close()
+        with conn:
+            conn.execute(
+                "UPDATE reply_queue SET status = 'posted', posted_at = ?, error_message = '' WHERE id = ?",
+                (now, queue_id),
+            )
+        _reddit_breaker.record_success()
         log.info(f"Posted reply #{queue_id} to {url}")
         return True, "Posted successfully"
 
     except Exception as e:
+        # Only outage-type errors count against Reddit; a locked thread etc. is per-item
+        if isinstance(e, _transient_errors()):
+            _reddit_breaker.record_failure()
+        else:
+            _reddit_breaker.record_success()
         update_queue_status(queue_id, "failed", error=str(e)[:500])
         log.error(f"Failed to post reply #{queue_id}: {e}")
         return False, str(e)
@@ -124,16 +172,26 @@ def _poster_loop():
     _poster_running = True
     while _poster_running:
         try:
-            items = get_queue_items(status="approved", limit=1)
-            if items:
-                item = items[0]
-                post_reply(item["id"])
-                # Rate limit: 5 min + random 0-60s jitter
-                delay = 300 + random.randint(0, 60)
-                log.info(f"Rate limit: waiting {delay}s before next post")
+            queue_ids = get_approved_queue_ids(limit=_POST_BATCH)
+            if not queue_ids:
+                # approve_reply() wakes us; the timeout is only a fallback
+                _wake.wait(timeout=300)
+                _wake.clear()
+                continue
+            for queue_id in queue_ids:
+                if not _poster_running:
+                    break
+                ok, msg = post_reply(queue_id)
+                if msg == _NOT_APPROVED:
+                    continue
+                if msg == _REDDIT_UNAVAILABLE:
+                    # Leave the rest approved and wait out the breaker
+                    time.sleep(_reddit_breaker.recovery)
+                    break
+                # Rate limit: 5-10 min, spread uniformly so posts don't land on a fixed cadence
+                delay = random.uniform(300, 600)
+                log.info(f"Rate limit: waiting {delay:.0f}s before next post")
                 time.sleep(delay)
-            else:
-                time.sleep(30)  # Check every 30s when idle
         except Exception as e:
             log.error(f"Poster loop error: {e}")
             time.sleep(60)
@@ -152,3 +210,4 @@ def start_poster_thread():
 def stop_poster_thread():
     global _poster_running
     _poster_running = False
+    _wake.set()
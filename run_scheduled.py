@@ -2,8 +2,8 @@
 """Scheduled runner for Gold Rush Scanner. Runs scans every SCAN_INTERVAL_HOURS."""
 
 import logging
-import schedule
-import time
+import signal
+import threading
 from config import SCAN_INTERVAL_HOURS
 from scanner import run_full_scan
 
@@ -23,9 +23,15 @@ def job():
 
 
 if __name__ == "__main__":
+    # Set on SIGTERM/SIGINT; the wait below returns at once and the loop exits
+    # (after any scan in progress finishes)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
     log.info(f"Scheduler started — scanning every {SCAN_INTERVAL_HOURS} hours")
     job()  # Run immediately on start
-    schedule.every(SCAN_INTERVAL_HOURS).hours.do(job)
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    # Like schedule's every(N).hours: the next scan is N hours after the last one ends
+    while not stop.wait(SCAN_INTERVAL_HOURS * 3600):
+        job()
+    log.info("Scheduler stopped")
@@ -5,56 +5,60 @@ import argparse
 import logging
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from datetime import datetime, timezone
 
 from config import (
-    SUBREDDITS, KEYWORDS, MIN_SCORE_THRESHOLD,
+    SUBREDDITS, KEYWORDS, TARGET_LOCATIONS, MIN_SCORE_THRESHOLD,
     REDDIT_BASE_URL, USER_AGENT, REQUEST_DELAY, SCAN_INTERVAL_HOURS,
+    KEYWORD_MATCHER, LOCATION_MATCHER, LOCAL_TERMS_MATCHER, PROFILE_TERM_MATCHER,
 )
 
 # Import location targeting if configured
 try:
-    from config import TARGET_LOCATIONS, LOCATION_SCORE_BOOST
+    from config import LOCATION_SCORE_BOOST
 except ImportError:
-    TARGET_LOCATIONS = []
     LOCATION_SCORE_BOOST = 0
 
 try:
-    from config import LOCAL_SUBREDDITS, LOCAL_REQUIRED_TERMS
+    from config import LOCAL_SUBREDDITS_SET
 except ImportError:
-    LOCAL_SUBREDDITS = []
-    LOCAL_REQUIRED_TERMS = []
+    LOCAL_SUBREDDITS_SET = frozenset()
 
-try:
-    from config import NEGATIVE_KEYWORDS
-except ImportError:
-    NEGATIVE_KEYWORDS = []
 
-try:
-    from config import SELLER_SIGNALS
-except ImportError:
-    SELLER_SIGNALS = []
+def _scan_terms(text_lower):
+    """Match the keyword, negative, seller and location tables against text_lower in one pass.
+
+    Returns {table: [values]}, each list in the table's configured order.
+    """
+    hits = {"keyword": [], "negative": [], "seller": [], "location": []}
+    for table, value in PROFILE_TERM_MATCHER.find(text_lower):
+        hits[table].append(value)
+    return hits
 
 
-def _hits_negative_keyword(text_lower):
+def _hits_negative_keyword(hits):
     """Check if text matches a negative keyword (obvious non-remodeling)."""
-    return any(neg in text_lower for neg in NEGATIVE_KEYWORDS)
+    return bool(hits["negative"])
 
 
-def _is_seller(text_lower):
+def _is_seller(hits):
     """Check if post is from a seller/advertiser (offering services, not seeking them)."""
-    if not SELLER_SIGNALS:
-        return False
-    hits = sum(1 for s in SELLER_SIGNALS if s in text_lower)
-    return hits >= 2
+    return len(hits["seller"]) >= 2
 
 
-def _passes_local_filter(text, subreddit):
+def _passes_local_filter(text_lower, subreddit):
     """For local subreddits, require remodeling-related terms."""
-    if subreddit not in LOCAL_SUBREDDITS:
+    if subreddit not in LOCAL_SUBREDDITS_SET:
         return True  # national subreddits pass through
-    text_lower = text.lower()
-    return any(term in text_lower for term in LOCAL_REQUIRED_TERMS)
+    return LOCAL_TERMS_MATCHER.search(text_lower) is not None
 
 
 def _is_colorado_relevant(text_lower, subreddit):
@@ -64,15 +68,14 @@ def _is_colorado_relevant(text_lower, subreddit):
     National subreddits need either a Colorado location mention OR very high
     keyword specificity (score >= 7 without location boost).
     """
-    if subreddit in LOCAL_SUBREDDITS:
+    if subreddit in LOCAL_SUBREDDITS_SET:
         return True
     # Check if they mention Colorado
-    if TARGET_LOCATIONS:
-        for loc in TARGET_LOCATIONS:
-            if loc in text_lower:
-                return True
+    if LOCATION_MATCHER.search(text_lower) is not None:
+        return True
     return False  # national sub, no CO mention — will get score penalty
-from db import insert_lead, is_lead_queued, add_to_queue, get_connection
+from db import insert_leads_returning, add_to_queue_bulk
+from reliability import RateLimiter
 from templates import generate_reply
 
 logging.basicConfig(
@@ -82,38 +85,42 @@ logging.basicConfig(
 )
 log = logging.getLogger("scanner")
 
-def _auto_queue_lead(author, content, subreddit, score, url):
-    """Auto-queue a reply for high-intent leads."""
+def _auto_queue_lead(lead_id, author, content, subreddit, score, url):
+    """Draft the auto-reply for a newly inserted high-intent lead.
+
+    Returns a (lead_id, reply, url) row for add_to_queue_bulk, or None.
+    lead_id comes straight from the INSERT, so nothing can be queued for it
+    yet (leads.id is AUTOINCREMENT and never reused) and no lookup is needed.
+    """
     if score < 7:
-        return
+        return None
     try:
-        conn = get_connection()
-        row = conn.execute("SELECT id FROM leads WHERE url = ?", (url,)).fetchone()
-        conn.close()
-        if not row:
-            return
-        lead_id = row["id"]
-        if is_lead_queued(lead_id):
-            return
-        reply = generate_reply(author, content, subreddit, score)
-        add_to_queue(lead_id, reply, url)
-        log.info(f"Auto-queued reply for lead #{lead_id} (score={score})")
+        return lead_id, generate_reply(author, content, subreddit, score), url
     except Exception as e:
         log.warning(f"Auto-queue failed: {e}")
+        return None
 
 
 session = requests.Session()
 session.headers.update({"User-Agent": USER_AGENT})
+# Enough kept-alive sockets for the listing workers plus the comment fetches;
+# transient 429/5xx responses are retried with backoff (honouring Retry-After)
+session.mount("https://", HTTPAdapter(
+    pool_connections=2, pool_maxsize=8,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
 
+# Every Reddit request, from any thread, waits its turn here; this replaces
+# the fixed sleeps between calls and keeps the overall request rate unchanged.
+_reddit_limiter = RateLimiter(REQUEST_DELAY)
 
-def _check_location(text_lower):
-    """Check if text mentions a target location. Returns matched location or None."""
-    if not TARGET_LOCATIONS:
-        return None
-    for loc in TARGET_LOCATIONS:
-        if loc in text_lower:
-            return loc
-    return None
+
+# Scoring needs a keyword or location hit, so anything shorter than the
+# shortest of those can't become a lead and skips term matching entirely
+_MIN_SCORABLE_LEN = min(map(len, [*KEYWORDS, *TARGET_LOCATIONS]), default=1)
+
+# A location mention with no keyword hit still scores if it also names one of these
+_LOCATION_ONLY_TERMS = ("remodel", "renovate", "contractor", "kitchen", "bathroom", "remodeler")
 
 
 def score_text(text, subreddit=None):
@@ -123,15 +130,17 @@ def score_text(text, subreddit=None):
     (they can't be served by a CO-only contractor).
     """
     text_lower = text.lower()
-    matches = []
-    for keyword, weight in KEYWORDS.items():
-        if keyword in text_lower:
-            matches.append((keyword, weight))
+    return _score_hits(_scan_terms(text_lower), text_lower, subreddit)
+
+
+def _score_hits(hits, text_lower, subreddit):
+    """score_text for a post that has already been through _scan_terms."""
+    matches = hits["keyword"]
+    location = hits["location"][0] if hits["location"] else None
     if not matches:
         # Even with no keyword match, if they mention a target location in a
         # relevant subreddit, give it a base score
-        location = _check_location(text_lower)
-        if location and any(kw in text_lower for kw in ["remodel", "renovate", "contractor", "kitchen", "bathroom", "remodeler"]):
+        if location and any(kw in text_lower for kw in _LOCATION_ONLY_TERMS):
             return min(LOCATION_SCORE_BOOST + 3, 10), [(f"📍 {location}", LOCATION_SCORE_BOOST + 3)]
         return 0, []
     best = max(w for _, w in matches)
@@ -139,11 +148,10 @@ def score_text(text, subreddit=None):
     score = best + bonus
     
     # Location boost — if post mentions a target location, boost the score
-    location = _check_location(text_lower)
     if location:
         score += LOCATION_SCORE_BOOST
         matches.append((f"📍 {location}", LOCATION_SCORE_BOOST))
-    elif subreddit and subreddit not in LOCAL_SUBREDDITS:
+    elif subreddit and subreddit not in LOCAL_SUBREDDITS_SET:
         # National sub, no Colorado mention — cap score (can't serve them)
         score = min(score, 6)
         matches.append(("⚠️ no CO location", 0))
@@ -151,12 +159,20 @@ def score_text(text, subreddit=None):
     return min(score, 10), matches
 
 
+def _parse_json(resp):
+    """Decode a Reddit JSON response, with orjson when it's installed."""
+    if orjson is not None:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
 def fetch_subreddit(subreddit, sort="new", limit=50):
     url = f"{REDDIT_BASE_URL}/r/{subreddit}/{sort}.json?limit={limit}"
+    _reddit_limiter.wait()
     try:
         resp = session.get(url, timeout=15)
         resp.raise_for_status()
-        return resp.json().get("data", {}).get("children", [])
+        return _parse_json(resp).get("data", {}).get("children", [])
     except Exception as e:
         log.warning(f"Error fetching r/{subreddit}: {e}")
         return []
@@ -164,10 +180,11 @@ def fetch_subreddit(subreddit, sort="new", limit=50):
 
 def fetch_comments(permalink):
     url = f"{REDDIT_BASE_URL}{permalink}.json?limit=100"
+    _reddit_limiter.wait()
     try:
         resp = session.get(url, timeout=15)
         resp.raise_for_status()
-        data = resp.json()
+        data = _parse_json(resp)
         if len(data) > 1:
             return data[1].get("data", {}).get("children", [])
     except Exception as e:
@@ -176,19 +193,29 @@ def fetch_comments(permalink):
 
 
 def extract_comments_flat(children):
+    """Flatten a comment tree, each comment followed by its replies.
+
+    Walks with an explicit stack of child iterators rather than recursing,
+    so deep threads cost neither a frame nor an intermediate list per level.
+    """
     results = []
-    for child in children:
+    stack = [iter(children)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+            continue
         if child.get("kind") != "t1":
             continue
         d = child["data"]
         results.append(d)
         if d.get("replies") and isinstance(d["replies"], dict):
-            nested = d["replies"].get("data", {}).get("children", [])
-            results.extend(extract_comments_flat(nested))
+            stack.append(iter(d["replies"].get("data", {}).get("children", [])))
     return results
 
 
 def process_post(post_data, subreddit):
+    """Evaluate a post. Returns a pending lead (row, matches) for _store_leads, or None."""
     title = post_data.get("title", "")
     selftext = post_data.get("selftext", "")
     text = f"{title} {selftext}".strip()
@@ -197,113 +224,146 @@ def process_post(post_data, subreddit):
     created = post_data.get("created_utc", 0)
 
     if author in ("[deleted]", "AutoModerator"):
-        return 0
+        return None
 
     text_low = text.lower()
+    if len(text_low) < _MIN_SCORABLE_LEN:
+        return None
+    hits = _scan_terms(text_low)
 
     # Skip obviously irrelevant posts
-    if _hits_negative_keyword(text_low):
-        return 0
+    if _hits_negative_keyword(hits):
+        return None
 
     # Skip sellers/advertisers
-    if _is_seller(text_low):
-        return 0
+    if _is_seller(hits):
+        return None
 
     # Skip posts in local subreddits that aren't about remodeling
-    if not _passes_local_filter(text, subreddit):
-        return 0
+    if not _passes_local_filter(text_low, subreddit):
+        return None
 
-    score, matches = score_text(text, subreddit)
+    score, matches = _score_hits(hits, text_low, subreddit)
     if score >= MIN_SCORE_THRESHOLD:
         url = f"https://reddit.com{permalink}"
         ts = datetime.fromtimestamp(created, tz=timezone.utc).isoformat()
-        inserted = insert_lead("reddit", author, text[:2000], url, subreddit, score, ts)
-        if inserted:
-            log.info(f"Lead: u/{author} (score={score}) — {', '.join(k for k,_ in matches)}")
-            _auto_queue_lead(author, text[:2000], subreddit, score, url)
-            if score >= 8:
-                try:
-                    from notifications import notify_high_intent_lead
-                    notify_high_intent_lead(author, subreddit, score, text[:500], url)
-                except Exception as e:
-                    log.warning(f"Notification failed: {e}")
-            return 1
-    return 0
+        return ("reddit", author, text[:2000], url, subreddit, score, ts), matches
+    return None
 
 
 def process_comment(comment_data, subreddit):
+    """Evaluate a comment. Returns a pending lead (row, matches) for _store_leads, or None."""
     body = comment_data.get("body", "")
     author = comment_data.get("author", "[deleted]")
     permalink = comment_data.get("permalink", "")
     created = comment_data.get("created_utc", 0)
 
     if author in ("[deleted]", "AutoModerator"):
-        return 0
+        return None
 
     body_low = body.lower()
+    if len(body_low) < _MIN_SCORABLE_LEN:
+        return None
+    hits = _scan_terms(body_low)
 
     # Skip obviously irrelevant comments
-    if _hits_negative_keyword(body_low):
-        return 0
+    if _hits_negative_keyword(hits):
+        return None
 
     # Skip sellers/advertisers
-    if _is_seller(body_low):
-        return 0
+    if _is_seller(hits):
+        return None
 
     # Skip comments in local subreddits that aren't about remodeling
-    if not _passes_local_filter(body, subreddit):
-        return 0
+    if not _passes_local_filter(body_low, subreddit):
+        return None
 
-    score, matches = score_text(body, subreddit)
+    score, matches = _score_hits(hits, body_low, subreddit)
     if score >= MIN_SCORE_THRESHOLD:
         url = f"https://reddit.com{permalink}"
         ts = datetime.fromtimestamp(created, tz=timezone.utc).isoformat()
-        inserted = insert_lead("reddit", author, body[:2000], url, subreddit, score, ts)
-        if inserted:
-            log.info(f"Lead: u/{author} (score={score}) — {', '.join(k for k,_ in matches)}")
-            _auto_queue_lead(author, body[:2000], subreddit, score, url)
-            if score >= 8:
-                try:
-                    from notifications import notify_high_intent_lead
-                    notify_high_intent_lead(author, subreddit, score, body[:500], url)
-                except Exception as e:
-                    log.warning(f"Notification failed: {e}")
-            return 1
-    return 0
-
-
-def scan_subreddit(subreddit, check_comments=True):
+        return ("reddit", author, body[:2000], url, subreddit, score, ts), matches
+    return None
+
+
+def _store_leads(pending):
+    """Insert pending leads in one transaction, then queue/notify the ones that are new.
+
+    Returns the number of new leads.
+    """
+    lead_ids = insert_leads_returning([row for row, _ in pending])
+    found = 0
+    replies = []
+    for lead_id, (row, matches) in zip(lead_ids, pending):
+        if not lead_id:
+            continue
+        _, author, content, url, subreddit, score, _ = row
+        log.info(f"Lead: u/{author} (score={score}) — {', '.join(k for k,_ in matches)}")
+        reply = _auto_queue_lead(lead_id, author, content, subreddit, score, url)
+        if reply:
+            replies.append((reply, score))
+        if score >= 8:
+            try:
+                from notifications import notify_high_intent_lead
+                notify_high_intent_lead(author, subreddit, score, content[:500], url)
+            except Exception as e:
+                log.warning(f"Notification failed: {e}")
+        found += 1
+
+    # All of this subreddit's auto-replies go into the queue in one transaction
+    if replies:
+        try:
+            add_to_queue_bulk([reply for reply, _ in replies])
+            for (lead_id, _, _), score in replies:
+                log.info(f"Auto-queued reply for lead #{lead_id} (score={score})")
+        except Exception as e:
+            log.warning(f"Auto-queue failed: {e}")
+    return found
+
+
+def _fetch_listings(subreddit):
+    """The new and hot listings scan_subreddit works through."""
+    return fetch_subreddit(subreddit, sort="new", limit=50), fetch_subreddit(subreddit, sort="hot", limit=25)
+
+
+def scan_subreddit(subreddit, check_comments=True, listings=None):
+    """Scan one subreddit. listings is a prefetched _fetch_listings result, if any."""
     log.info(f"Scanning r/{subreddit}...")
-    leads_found = 0
+    pending = []  # written together by _store_leads once the subreddit is done
 
-    posts = fetch_subreddit(subreddit, sort="new", limit=50)
+    posts, hot_posts = listings if listings is not None else _fetch_listings(subreddit)
     log.info(f"  Fetched {len(posts)} posts from r/{subreddit}")
 
+    seen = set()  # permalinks already handled, so the hot pass skips overlap with new
     for post in posts:
         if post.get("kind") != "t3":
             continue
         d = post["data"]
-        leads_found += process_post(d, subreddit)
+        seen.add(d.get("permalink"))
+        lead = process_post(d, subreddit)
+        if lead:
+            pending.append(lead)
 
         if check_comments:
-            title = d.get("title", "").lower()
-            if any(kw in title for kw in KEYWORDS):
-                time.sleep(REQUEST_DELAY)
+            if KEYWORD_MATCHER.search(d.get("title", "").lower()) is not None:
                 comments = fetch_comments(d.get("permalink", ""))
                 flat = extract_comments_flat(comments)
                 for c in flat:
-                    leads_found += process_comment(c, subreddit)
-
-    time.sleep(REQUEST_DELAY)
+                    lead = process_comment(c, subreddit)
+                    if lead:
+                        pending.append(lead)
 
-    hot_posts = fetch_subreddit(subreddit, sort="hot", limit=25)
     for post in hot_posts:
         if post.get("kind") != "t3":
             continue
         d = post["data"]
-        leads_found += process_post(d, subreddit)
+        if d.get("permalink") in seen:
+            continue
+        lead = process_post(d, subreddit)
+        if lead:
+            pending.append(lead)
 
-    return leads_found
+    return _store_leads(pending)
 
 
 def run_full_scan():
@@ -314,10 +374,11 @@ def run_full_scan():
     log.info("=" * 50)
 
     total = 0
-    for sub in SUBREDDITS:
-        found = scan_subreddit(sub)
-        total += found
-        time.sleep(REQUEST_DELAY)
+    # Listings are fetched ahead on worker threads (still paced by _reddit_limiter)
+    # while this thread scores posts, pulls comments and writes leads in order.
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        for sub, listings in zip(SUBREDDITS, ex.map(_fetch_listings, SUBREDDITS)):
+            total += scan_subreddit(sub, listings=listings)
 
     # NOTE: Disabled web/YouTube/Craigslist/Facebook scanners for precious_metals profile
     # Reason: They scrape dealer websites instead of real buyers
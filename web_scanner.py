@@ -1,19 +1,28 @@
 #!/usr/bin/env python3
 """Web search scraper for gold/silver buying discussions beyond Reddit."""
 
+import functools
 import logging
-import time
+import re
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from urllib.parse import urlparse
+from urllib.parse import urlsplit
 
 try:
     from bs4 import BeautifulSoup
 except ImportError:
     BeautifulSoup = None
 
-from config import KEYWORDS, MIN_SCORE_THRESHOLD, USER_AGENT, REQUEST_DELAY, PROFILE_WEB_QUERIES
-from db import insert_lead
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+from config import KEYWORD_MATCHER, MIN_SCORE_THRESHOLD, USER_AGENT, REQUEST_DELAY, PROFILE_WEB_QUERIES
+from db import insert_leads_returning
+from reliability import RateLimiter
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 log = logging.getLogger("web_scanner")
@@ -47,22 +56,98 @@ session.headers.update({
 })
 
 
+# One limiter per search host so Brave and Google are each paced on their own
+_host_limiters = {}
+_host_limiters_lock = threading.Lock()
+
+
+def _wait_for_host(url):
+    """Block until the host of url may be hit again (REQUEST_DELAY * 2 apart)."""
+    host = urlsplit(url).netloc
+    with _host_limiters_lock:
+        limiter = _host_limiters.get(host)
+        if limiter is None:
+            limiter = _host_limiters[host] = RateLimiter(REQUEST_DELAY * 2)
+    limiter.wait()
+
+
+# Result domains that are never forum discussions; matched anywhere in the host
+# so regional storefronts like amazon.com.au are skipped too
+SKIP_DOMAINS = ("amazon.com", "ebay.com", "wikipedia.org", "youtube.com", "facebook.com", "twitter.com")
+
+
+def _hostname(url):
+    """Lowercased host of url, without port or credentials ("" if there is none)."""
+    return urlsplit(url).hostname or ""
+
+
+def _domain_suffixes(domain):
+    """domain and each parent domain, longest first: a.b.com, b.com, com."""
+    labels = domain.split(".")
+    return (".".join(labels[i:]) for i in range(len(labels)))
+
+
 def _identify_forum(url):
     """Identify the forum name from a URL."""
-    domain = urlparse(url).netloc.lower().replace("www.", "")
-    for forum_domain, forum_name in KNOWN_FORUMS.items():
-        if forum_domain in domain:
-            return forum_name
+    domain = _hostname(url)
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return _forum_for_host(domain)
+
+
+@functools.lru_cache(maxsize=4096)
+def _forum_for_host(domain):
+    """Forum name for a host (minus www.), or the host itself if it isn't a known forum."""
+    for suffix in _domain_suffixes(domain):
+        if suffix in KNOWN_FORUMS:
+            return KNOWN_FORUMS[suffix]
     return domain
 
 
+# Regex fallback for Google results when no HTML parser is installed: one pass
+# pairs each outbound link with the <h3> title inside the same anchor.
+_SERP_RESULT_RE = re.compile(
+    r'<a\b[^>]*?href="(?P<href>https?://(?!www\.google)[^"]+)"[^>]*>'
+    r'(?:(?!</a>).)*?<h3[^>]*>(?P<title>.*?)</h3>',
+    re.DOTALL,
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _parse_html(html):
+    """Parse a page with selectolax (lexbor) when installed, else BeautifulSoup+lxml."""
+    if LexborHTMLParser is not None:
+        return LexborHTMLParser(html)
+    return BeautifulSoup(html, "lxml")
+
+
+def _select(node, selector):
+    if LexborHTMLParser is not None:
+        return node.css(selector)
+    return node.select(selector)
+
+
+def _select_one(node, selector):
+    if LexborHTMLParser is not None:
+        return node.css_first(selector)
+    return node.select_one(selector)
+
+
+def _node_text(node):
+    if LexborHTMLParser is not None:
+        return node.text(strip=True)
+    return node.get_text(strip=True)
+
+
+def _node_href(node):
+    if LexborHTMLParser is not None:
+        return node.attributes.get("href") or ""
+    return node.get("href", "")
+
+
 def _score_text(text):
     """Score text based on keyword matches. Returns (score, matched_keywords)."""
-    text_lower = text.lower()
-    matches = []
-    for keyword, weight in KEYWORDS.items():
-        if keyword in text_lower:
-            matches.append((keyword, weight))
+    matches = KEYWORD_MATCHER.find(text.lower())
     if not matches:
         return 0, []
     best = max(w for _, w in matches)
@@ -72,44 +157,45 @@ def _score_text(text):
 
 def search_google_scrape(query, num_results=20):
     """Scrape Google search results (fallback, no API key needed)."""
-    import re as _re
     results = []
-    if BeautifulSoup is None:
+    if BeautifulSoup is None and LexborHTMLParser is None:
         # Fallback: use regex to parse Google results
         url = f"https://www.google.com/search?q={requests.utils.quote(query)}&num={num_results}&hl=en"
+        _wait_for_host(url)
         try:
             resp = session.get(url, timeout=15)
             if resp.status_code == 200:
-                links = _re.findall(r'href="(https?://(?!www\.google)[^"]+)"', resp.text)
-                titles = _re.findall(r'<h3[^>]*>(.*?)</h3>', resp.text)
-                for i, href in enumerate(links[:num_results]):
-                    title = _re.sub(r'<[^>]+>', '', titles[i]).strip() if i < len(titles) else ""
-                    results.append({"url": href, "title": title, "snippet": ""})
+                for m in _SERP_RESULT_RE.finditer(resp.text):
+                    title = _TAG_RE.sub("", m.group("title")).strip()
+                    results.append({"url": m.group("href"), "title": title, "snippet": ""})
+                    if len(results) >= num_results:
+                        break
         except Exception as e:
             log.warning(f"Google search error: {e}")
         return results
     
     url = "https://www.google.com/search"
     params = {"q": query, "num": num_results, "hl": "en"}
+    _wait_for_host(url)
     try:
         resp = session.get(url, params=params, timeout=15)
         if resp.status_code != 200:
             log.warning(f"Google returned status {resp.status_code} for query: {query}")
             return results
-        soup = BeautifulSoup(resp.text, "lxml")
-        for g in soup.select("div.g"):
-            link_tag = g.select_one("a[href]")
-            title_tag = g.select_one("h3")
-            snippet_tag = g.select_one("div.VwiC3b, span.aCOpRe, div[data-sncf]")
+        tree = _parse_html(resp.text)
+        for g in _select(tree, "div.g"):
+            link_tag = _select_one(g, "a[href]")
+            title_tag = _select_one(g, "h3")
+            snippet_tag = _select_one(g, "div.VwiC3b, span.aCOpRe, div[data-sncf]")
             if not link_tag or not title_tag:
                 continue
-            href = link_tag.get("href", "")
+            href = _node_href(link_tag)
             if not href.startswith("http"):
                 continue
             results.append({
-                "title": title_tag.get_text(strip=True),
+                "title": _node_text(title_tag),
                 "url": href,
-                "snippet": snippet_tag.get_text(strip=True) if snippet_tag else "",
+                "snippet": _node_text(snippet_tag) if snippet_tag else "",
             })
     except Exception as e:
         log.warning(f"Google scrape error for '{query}': {e}")
@@ -123,6 +209,7 @@ def search_brave_api(query, api_key=None, count=20):
     url = "https://api.search.brave.com/res/v1/web/search"
     headers = {"Accept": "application/json", "Accept-Encoding": "gzip", "X-Subscription-Token": api_key}
     params = {"q": query, "count": count}
+    _wait_for_host(url)
     try:
         resp = requests.get(url, headers=headers, params=params, timeout=15)
         resp.raise_for_status()
@@ -140,57 +227,89 @@ def search_brave_api(query, api_key=None, count=20):
         return []
 
 
+# Only the first posts of a thread are used, so long threads are cut off here
+_MAX_FORUM_PAGE_BYTES = 256 * 1024
+
+
+def _read_capped(resp, limit):
+    """Body of a streamed response as text, reading at most about `limit` bytes."""
+    chunks = []
+    size = 0
+    for chunk in resp.iter_content(chunk_size=16384):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    return b"".join(chunks).decode(resp.encoding or "utf-8", errors="replace")
+
+
 def scrape_forum_page(url):
     """Try to scrape additional content from a forum page."""
     try:
-        resp = session.get(url, timeout=10)
-        if resp.status_code != 200:
-            return None
-        soup = BeautifulSoup(resp.text, "lxml")
+        with session.get(url, timeout=10, stream=True) as resp:
+            if resp.status_code != 200:
+                return None
+            html = _read_capped(resp, _MAX_FORUM_PAGE_BYTES)
+        tree = _parse_html(html)
         # Try to extract post content
         for selector in ["div.post-content", "div.message-body", "article", "div.post", "div.postbody", "td.post"]:
-            posts = soup.select(selector)
+            posts = _select(tree, selector)
             if posts:
-                return " ".join(p.get_text(strip=True)[:500] for p in posts[:3])
+                return " ".join(_node_text(p)[:500] for p in posts[:3])
         # Fallback: get main content area
-        main = soup.select_one("main, #content, .content, article")
+        main = _select_one(tree, "main, #content, .content, article")
         if main:
-            return main.get_text(strip=True)[:1000]
+            return _node_text(main)[:1000]
     except Exception as e:
         log.debug(f"Could not scrape {url}: {e}")
     return None
 
 
-def process_search_result(result):
-    """Process a single search result and save if it's a lead."""
+def process_search_result(result, found_at=None):
+    """Score a single search result. Returns its lead row if it's a lead, else None."""
     title = result.get("title", "")
     url = result.get("url", "")
     snippet = result.get("snippet", "")
 
     if not url or not title:
-        return 0
+        return None
 
     # Skip non-forum/non-relevant results
-    skip_domains = ["amazon.com", "ebay.com", "wikipedia.org", "youtube.com", "facebook.com", "twitter.com"]
-    domain = urlparse(url).netloc.lower()
-    if any(s in domain for s in skip_domains):
-        return 0
+    domain = _hostname(url)
+    if any(s in domain for s in SKIP_DOMAINS):
+        return None
 
     text = f"{title} {snippet}"
     score, matches = _score_text(text)
 
     if score < MIN_SCORE_THRESHOLD:
-        return 0
+        return None
 
     forum_name = _identify_forum(url)
-    now = datetime.now(timezone.utc).isoformat()
+    if found_at is None:
+        found_at = datetime.now(timezone.utc).isoformat()
 
     # Use forum name as "subreddit" field for consistency
-    inserted = insert_lead("web", forum_name, text[:2000], url, forum_name, score, now)
-    if inserted:
-        log.info(f"Web lead: {forum_name} (score={score}) — {title[:80]}")
-        return 1
-    return 0
+    return ("web", forum_name, text[:2000], url, forum_name, score, found_at)
+
+
+def _store_leads(pending):
+    """Insert one query's (row, title) leads in a single transaction. Returns the number new."""
+    lead_ids = insert_leads_returning([row for row, _ in pending])
+    found = 0
+    for lead_id, (row, title) in zip(lead_ids, pending):
+        if lead_id:
+            log.info(f"Web lead: {row[1]} (score={row[5]}) — {title[:80]}")
+            found += 1
+    return found
+
+
+def _run_query(query, brave_api_key=None):
+    """Results for one query: Brave API first, falling back to Google scraping."""
+    results = search_brave_api(query, brave_api_key)
+    if not results:
+        results = search_google_scrape(query)
+    return results
 
 
 def run_web_scan(brave_api_key=None):
@@ -199,40 +318,29 @@ def run_web_scan(brave_api_key=None):
     total = 0
     seen_urls = set()
 
-    for query in SEARCH_QUERIES:
-        log.info(f"  Searching: {query}")
-
-        # Try Brave API first, fall back to Google scraping
-        results = search_brave_api(query, brave_api_key)
-        if not results:
-            results = search_google_scrape(query)
-
-        for result in results:
-            url = result.get("url", "")
-            if url in seen_urls:
-                continue
-            seen_urls.add(url)
-            total += process_search_result(result)
-
-        time.sleep(REQUEST_DELAY * 2)  # Be polite with search engines
-
-    # Also search specifically within known forums
-    for forum_domain, forum_name in KNOWN_FORUMS.items():
-        query = f"site:{forum_domain} remodel OR renovation OR contractor Colorado OR Denver"
-        log.info(f"  Searching forum: {forum_name}")
-
-        results = search_brave_api(query, brave_api_key)
-        if not results:
-            results = search_google_scrape(query)
-
-        for result in results:
-            url = result.get("url", "")
-            if url in seen_urls:
-                continue
-            seen_urls.add(url)
-            total += process_search_result(result)
-
-        time.sleep(REQUEST_DELAY * 2)
+    # General queries first, then searches within each known forum
+    queries = list(SEARCH_QUERIES) + [
+        f"site:{forum_domain} remodel OR renovation OR contractor Colorado OR Denver"
+        for forum_domain in KNOWN_FORUMS
+    ]
+
+    # Searches run on worker threads (each search host still paced by
+    # _wait_for_host); results are deduped and scored here in query order.
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        all_results = ex.map(lambda q: _run_query(q, brave_api_key), queries)
+        for query, results in zip(queries, all_results):
+            log.info(f"  Searched: {query} ({len(results)} results)")
+            pending = []
+            found_at = datetime.now(timezone.utc).isoformat()  # one timestamp per query batch
+            for result in results:
+                url = result.get("url", "")
+                if url in seen_urls:
+                    continue
+                seen_urls.add(url)
+                row = process_search_result(result, found_at)
+                if row:
+                    pending.append((row, result["title"]))
+            total += _store_leads(pending)
 
     log.info(f"Web scan complete! {total} new leads found.")
     return total
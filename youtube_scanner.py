@@ -9,28 +9,38 @@ Get one at: https://console.cloud.google.com/apis/credentials
 4. Set YOUTUBE_API_KEY in config.py
 """
 
+import hashlib
 import logging
-import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timezone
 
 from config import (
     YOUTUBE_API_KEY, YOUTUBE_SEARCH_QUERIES,
     KEYWORDS, MIN_SCORE_THRESHOLD, REQUEST_DELAY,
 )
-from db import insert_lead
+from db import insert_leads_returning
+from reliability import RateLimiter
 from scanner import score_text
 
 log = logging.getLogger("youtube")
 
 API_BASE = "https://www.googleapis.com/youtube/v3"
 
+# Keep-alive connections to the API host, one per comment-fetch worker
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Comment fetches run on worker threads but stay REQUEST_DELAY apart
+_comments_limiter = RateLimiter(REQUEST_DELAY)
+
 
 def search_videos(query, max_results=10):
     """Search YouTube for videos matching query. Requires API key."""
     if not YOUTUBE_API_KEY:
         return []
-    resp = requests.get(f"{API_BASE}/search", params={
+    resp = session.get(f"{API_BASE}/search", params={
         "part": "snippet",
         "q": query,
         "type": "video",
@@ -56,8 +66,9 @@ def get_comments(video_id, max_results=100):
         "textFormat": "plainText",
         "key": YOUTUBE_API_KEY,
     }
+    _comments_limiter.wait()
     try:
-        resp = requests.get(f"{API_BASE}/commentThreads", params=params, timeout=15)
+        resp = session.get(f"{API_BASE}/commentThreads", params=params, timeout=15)
         resp.raise_for_status()
         for item in resp.json().get("items", []):
             snip = item["snippet"]["topLevelComment"]["snippet"]
@@ -72,23 +83,35 @@ def get_comments(video_id, max_results=100):
     return comments
 
 
-def process_youtube_comment(comment):
-    """Score and save a YouTube comment if it meets threshold."""
+def process_youtube_comment(comment, found_at=None):
+    """Score a YouTube comment. Returns (row, matches) if it meets threshold, else None."""
     text = comment["text"]
     author = comment["author"]
     video_id = comment["video_id"]
 
     score, matches = score_text(text)
-    if score >= MIN_SCORE_THRESHOLD:
-        url = f"https://youtube.com/watch?v={video_id}"
-        inserted = insert_lead(
-            "youtube", author, text[:2000], f"{url}#comment-{hash(text) & 0xFFFFFF:06x}",
-            "youtube", score, comment.get("published") or datetime.now(timezone.utc).isoformat(),
-        )
-        if inserted:
-            log.info(f"YT Lead: {author} (score={score}) — {', '.join(k for k,_ in matches)}")
-            return 1
-    return 0
+    if score < MIN_SCORE_THRESHOLD:
+        return None
+    url = f"https://youtube.com/watch?v={video_id}"
+    # Stable across runs (unlike hash()), so a re-scanned comment maps to the same URL
+    anchor = hashlib.blake2b(text.encode("utf-8"), digest_size=4).hexdigest()
+    published = comment.get("published") or found_at or datetime.now(timezone.utc).isoformat()
+    row = (
+        "youtube", author, text[:2000], f"{url}#comment-{anchor}",
+        "youtube", score, published,
+    )
+    return row, matches
+
+
+def _store_leads(pending):
+    """Insert one query's (row, matches) leads in a single transaction. Returns the number new."""
+    lead_ids = insert_leads_returning([row for row, _ in pending])
+    found = 0
+    for lead_id, (row, matches) in zip(lead_ids, pending):
+        if lead_id:
+            log.info(f"YT Lead: {row[1]} (score={row[5]}) — {', '.join(k for k,_ in matches)}")
+            found += 1
+    return found
 
 
 def run_youtube_scan():
@@ -101,22 +124,26 @@ def run_youtube_scan():
     total = 0
     seen_videos = set()
 
-    for query in YOUTUBE_SEARCH_QUERIES:
-        log.info(f"  Searching YouTube: '{query}'")
-        try:
-            video_ids = search_videos(query, max_results=5)
-        except Exception as e:
-            log.warning(f"  Search failed: {e}")
-            continue
-
-        for vid in video_ids:
-            if vid in seen_videos:
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        for query in YOUTUBE_SEARCH_QUERIES:
+            log.info(f"  Searching YouTube: '{query}'")
+            try:
+                video_ids = search_videos(query, max_results=5)
+            except Exception as e:
+                log.warning(f"  Search failed: {e}")
                 continue
-            seen_videos.add(vid)
-            time.sleep(REQUEST_DELAY)
-            comments = get_comments(vid)
-            for c in comments:
-                total += process_youtube_comment(c)
+
+            new_ids = [vid for vid in dict.fromkeys(video_ids) if vid not in seen_videos]
+            seen_videos.update(new_ids)
+            # Fetch this query's comment pages concurrently, score them in video order
+            pending = []
+            found_at = datetime.now(timezone.utc).isoformat()  # for comments without publishedAt
+            for comments in ex.map(get_comments, new_ids):
+                for c in comments:
+                    lead = process_youtube_comment(c, found_at)
+                    if lead:
+                        pending.append(lead)
+            total += _store_leads(pending)
 
     log.info(f"YouTube scan complete — {total} new leads")
     return total